@@ -1,24 +1,86 @@
 # app/__init__.py
+import time
+
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from config import Config
 
-db = SQLAlchemy()
+from .replicas import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 
-def create_app():
+def create_app(config=None):
+    """config - словарь настроек поверх Config (например, для тестов)."""
+    started = time.perf_counter()
+    timings = {}
+
     app = Flask(__name__)
     app.config.from_object(Config)
+    if config:
+        app.config.update(config)
+
+    # Пул с замером времени ожидания соединения для /metrics
+    from .metrics import InstrumentedQueuePool
+    engine_options = dict(app.config["SQLALCHEMY_ENGINE_OPTIONS"])
+    engine_options.setdefault("poolclass", InstrumentedQueuePool)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options
 
     db.init_app(app)
 
     with app.app_context():
-        # Инициализация базы данных
+        # Метрики пула соединений (до первого соединения с базой)
+        from .metrics import init_metrics
+        init_metrics(app)
+
+        # Проверка версии схемы; сами миграции выполняет "flask db upgrade"
+        step = time.perf_counter()
         from .database import init_db
-        init_db()
+        init_db(auto_upgrade=app.config["AUTO_MIGRATE"])
+        timings["schema_check"] = time.perf_counter() - step
+
+        # Версии таблиц для ETag (после миграций: нужна таблица table_versions)
+        from .http_cache import init_http_cache
+        init_http_cache(app)
+
+        # Фоновое обновление материализованных представлений
+        from .reporting import init_reporting
+        init_reporting(app)
+
+        # Трансляция результатов мероприятий зрителям
+        from .live import init_live
+        init_live(app)
+
+        # Чтение с реплик (если заданы DATABASE_REPLICA_URLS)
+        from .replicas import init_replicas
+        init_replicas(app)
+
+        # Контроль количества SQL-запросов на запрос
+        from .query_guard import init_query_guard
+        init_query_guard(app)
+
+        # Кэш отрендеренных фрагментов страниц
+        from .fragments import init_fragment_cache
+        init_fragment_cache(app)
+
+        # Профилирование запросов (только при PROFILING=1)
+        from .profiling import init_profiling
+        init_profiling(app)
 
         # Регистрация маршрутов
+        step = time.perf_counter()
         from .routes import register_routes
         register_routes(app)
+        from .api import register_api
+        register_api(app)
+        timings["routes"] = time.perf_counter() - step
+
+        # Регистрация CLI-команд
+        from .commands import register_commands
+        register_commands(app)
+
+    timings["total"] = time.perf_counter() - started
+    app.extensions["startup_timings"] = timings
+    print("Startup: " + ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in timings.items()))
 
-    return app
\ No newline at end of file
+    return app
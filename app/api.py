@@ -0,0 +1,271 @@
+# app/api.py
+# JSON API только для чтения: /api/v1 (школы, мероприятия, участники, результаты, таблица очков).
+# Ответы строятся из строк Core-запросов без ORM-объектов и кодируются orjson,
+# если он установлен (иначе стандартным json без пробелов). Параметры списков:
+#   fields=a,b   - только перечисленные поля (и только эти колонки в SELECT);
+#   sort, order, limit, after, before - keyset-пагинация (app/pagination.py).
+# Ответ сжимается brotli (если установлен пакет brotli) или gzip по Accept-Encoding
+# и получает ETag по версиям таблиц (app/http_cache.py): повторный запрос без
+# изменений данных получает 304 без обращения к базе.
+import gzip
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from flask import Response, abort, request
+from sqlalchemy import select
+
+from . import db
+from .http_cache import etag_for, read_fresh
+from .models import Category, Class, Event, Participant, Result, School, Sport, Teacher
+from .pagination import MAX_LIMIT, paginate_stream
+from .standings import standings_query
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PREFIX = "/api/v1"
+# Меньшие ответы не сжимаются
+COMPRESS_MIN_BYTES = 1024
+
+
+def _default(value):
+    if isinstance(value, timedelta):
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _encoding():
+    """Сжатие, которое принимает клиент: "br", "gzip" или None."""
+    encodings = request.accept_encodings
+    if brotli is not None and "br" in encodings:
+        return "br"
+    if "gzip" in encodings:
+        return "gzip"
+    return None
+
+
+def _compress(body, encoding):
+    if encoding is None or len(body) < COMPRESS_MIN_BYTES:
+        return body, None
+    if encoding == "br":
+        return brotli.compress(body, quality=4), "br"
+    return gzip.compress(body, compresslevel=6), "gzip"
+
+
+def _response(tables, build):
+    """JSON-ответ с ETag по версиям таблиц; build() вызывается, только если данные изменились."""
+    encoding = _encoding()
+    versions_etag = etag_for(tables)
+    # Сильный ETag обозначает байты ответа: у сжатых вариантов он свой
+    etag = versions_etag and f"{versions_etag}-{encoding or 'identity'}"
+    if etag and request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        if versions_etag:
+            read_fresh(tables, versions_etag)
+        body, encoding = _compress(dumps(build()), encoding)
+        response = Response(body, mimetype="application/json")
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+    if etag:
+        response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.no_cache = True
+    return response
+
+
+class Resource:
+    """Список для API: поля (имя -> выражение), соединения и варианты сортировки."""
+
+    def __init__(self, tables, fields, source, sorts, default_sort, filters=None):
+        self.tables = tables
+        self.fields = fields
+        self.source = source
+        self.sorts = sorts
+        self.default_sort = default_sort
+        self.filters = filters or {}
+
+    def selected_fields(self):
+        fields = request.args.get("fields")
+        if not fields:
+            return list(self.fields)
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        if not names or any(name not in self.fields for name in names):
+            abort(400)
+        return names
+
+    def query(self, names, columns=()):
+        # Колонки ключа сортировки нужны для курсора, даже если их нет среди полей
+        extra = [column for column in columns if column.key not in names]
+        query = self.source(select(*[self.fields[name].label(name) for name in names], *extra))
+        for name, (column, convert) in self.filters.items():
+            value = request.args.get(name, type=convert)
+            if value is not None:
+                query = query.where(column == value)
+        return query
+
+    def page(self, **where):
+        names = self.selected_fields()
+        sort = request.args.get("sort", self.default_sort)
+        query = self.query(names, self.sorts.get(sort, ()))
+        for column, value in where.items():
+            query = query.where(self.fields[column] == value)
+        page = paginate_stream(db.session, query, self.sorts, self.default_sort, max_limit=MAX_LIMIT)
+        data = [{name: getattr(row, name) for name in names} for row in page]
+        return {"data": data, "next": page.next_url, "prev": page.prev_url}
+
+    def one(self, **where):
+        names = self.selected_fields()
+        query = self.query(names)
+        for column, value in where.items():
+            query = query.where(self.fields[column] == value)
+        row = db.session.execute(query).first()
+        if row is None:
+            abort(404)
+        return {"data": dict(zip(names, row))}
+
+
+SCHOOLS = Resource(
+    tables=("schools",),
+    fields={
+        "school_id": School.school_id,
+        "name": School.name,
+        "address": School.address,
+        "contact_phone": School.contact_phone,
+    },
+    source=lambda query: query.select_from(School),
+    sorts={"name": (School.name, School.school_id), "id": (School.school_id,)},
+    default_sort="name",
+)
+
+EVENTS = Resource(
+    tables=("events", "sports", "teachers"),
+    fields={
+        "event_id": Event.event_id,
+        "name": Event.name,
+        "date": Event.date,
+        "location": Event.location,
+        "distance": Event.distance,
+        "sport_id": Event.sport_id,
+        "sport": Sport.name,
+        "responsible_id": Event.responsible_id,
+        "responsible": Teacher.first_name + " " + Teacher.last_name,
+    },
+    source=lambda query: query.select_from(Event)
+    .join(Sport, Sport.sport_id == Event.sport_id)
+    .join(Teacher, Teacher.teacher_id == Event.responsible_id),
+    sorts={"date": (Event.date, Event.event_id), "id": (Event.event_id,)},
+    default_sort="date",
+    filters={"sport_id": (Event.sport_id, int)},
+)
+
+PARTICIPANTS = Resource(
+    tables=("participants", "schools", "classes"),
+    fields={
+        "participant_id": Participant.participant_id,
+        "first_name": Participant.first_name,
+        "last_name": Participant.last_name,
+        "birth_date": Participant.birth_date,
+        "gender": Participant.gender,
+        "school_id": Participant.school_id,
+        "school": School.name,
+        "class_id": Participant.class_id,
+        "class": Class.name,
+    },
+    source=lambda query: query.select_from(Participant)
+    .join(School, School.school_id == Participant.school_id)
+    .join(Class, Class.class_id == Participant.class_id),
+    sorts={
+        "name": (Participant.last_name, Participant.first_name, Participant.participant_id),
+        "id": (Participant.participant_id,),
+    },
+    default_sort="name",
+    filters={"school_id": (Participant.school_id, int), "class_id": (Participant.class_id, int)},
+)
+
+RESULTS = Resource(
+    tables=("results", "participants", "schools", "categories"),
+    fields={
+        "result_id": Result.result_id,
+        "event_id": Result.event_id,
+        "participant_id": Result.participant_id,
+        "participant": Participant.first_name + " " + Participant.last_name,
+        "school_id": Participant.school_id,
+        "school": School.name,
+        "category_id": Result.category_id,
+        "category": Category.name,
+        "time": Result.time,
+        "points": Result.points,
+        "place": Result.place,
+    },
+    source=lambda query: query.select_from(Result)
+    .join(Participant, Participant.participant_id == Result.participant_id)
+    .join(School, School.school_id == Participant.school_id)
+    .join(Category, Category.category_id == Result.category_id),
+    sorts={
+        "place": (Result.category_id, Result.place, Result.result_id),
+        "id": (Result.result_id,),
+    },
+    default_sort="place",
+    filters={"category_id": (Result.category_id, int)},
+)
+
+
+def register_api(app):
+    @app.route(f"{PREFIX}/schools")
+    def api_schools():
+        return _response(SCHOOLS.tables, SCHOOLS.page)
+
+    @app.route(f"{PREFIX}/schools/<int:school_id>")
+    def api_school(school_id):
+        return _response(SCHOOLS.tables, lambda: SCHOOLS.one(school_id=school_id))
+
+    @app.route(f"{PREFIX}/events")
+    def api_events():
+        return _response(EVENTS.tables, EVENTS.page)
+
+    @app.route(f"{PREFIX}/events/<int:event_id>")
+    def api_event(event_id):
+        return _response(EVENTS.tables, lambda: EVENTS.one(event_id=event_id))
+
+    @app.route(f"{PREFIX}/events/<int:event_id>/results")
+    def api_event_results(event_id):
+        return _response(RESULTS.tables, lambda: RESULTS.page(event_id=event_id))
+
+    @app.route(f"{PREFIX}/participants")
+    def api_participants():
+        return _response(PARTICIPANTS.tables, PARTICIPANTS.page)
+
+    @app.route(f"{PREFIX}/participants/<int:participant_id>")
+    def api_participant(participant_id):
+        return _response(PARTICIPANTS.tables, lambda: PARTICIPANTS.one(participant_id=participant_id))
+
+    @app.route(f"{PREFIX}/standings")
+    def api_standings():
+        def build():
+            standings = standings_query().subquery()
+            # ORDER BY подзапроса не гарантирует порядок строк внешнего запроса
+            rows = db.session.execute(
+                select(standings).order_by(standings.c.total_points.desc(), standings.c.school_name)
+            ).mappings()
+            return {"data": [dict(row) for row in rows]}
+        return _response(("schools", "school_points"), build)
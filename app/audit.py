@@ -0,0 +1,30 @@
+# app/audit.py
+# Журнал действий пользователей в таблице logs.
+# Записи копятся в сессии и после успешного commit передаются фоновому
+# LogWriter; при rollback они отбрасываются. Вставка в logs не выполняется
+# в транзакции запроса и не добавляет обращений к базе во время HTTP-запроса.
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import db
+from .log_writer import get_log_writer
+
+
+def audit(action, user_id=None):
+    """Добавляет запись в журнал после commit текущей транзакции."""
+    if current_app.config.get("AUDIT_LOG"):
+        db.session.info.setdefault("audit", []).append(
+            (get_log_writer(current_app), action, user_id)
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _submit(session):
+    for writer, action, user_id in session.info.pop("audit", ()):
+        writer.submit(action, user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget(session):
+    session.info.pop("audit", None)
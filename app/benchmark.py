@@ -0,0 +1,158 @@
+# app/benchmark.py
+# Нагрузочный замер страниц через тестовый клиент Flask.
+# Для каждого GET-маршрута из register_routes выполняется заданное число
+# запросов (параметры вроде event_id берутся из данных в базе) и считаются
+# задержки p50/p95/p99, количество SQL-запросов на запрос и пропускная
+# способность. Итог сохраняется в JSON, чтобы сравнивать коммиты между собой.
+import json
+import math
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import event, select
+
+from . import db
+from .models import Event, EventParticipant, Result
+from .replicas import all_engines
+
+# Служебные маршруты и бесконечный поток event_live не замеряются
+SKIPPED_ENDPOINTS = {"static", "metrics", "debug_profile", "event_live"}
+
+_local = threading.local()
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, "statements", None) is not None:
+        _local.statements += 1
+
+
+def percentile(values, fraction):
+    """Перцентиль по методу ближайшего ранга; values отсортированы."""
+    if not values:
+        return None
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def _sample_args():
+    # Мероприятие с результатами и зарегистрированный на него участник
+    row = db.session.execute(
+        select(Result.result_id, Result.event_id, Result.participant_id).limit(1)
+    ).first()
+    args = {}
+    if row is not None:
+        args = {"result_id": row.result_id, "event_id": row.event_id, "participant_id": row.participant_id}
+    else:
+        registration = db.session.execute(select(EventParticipant).limit(1)).scalar()
+        if registration is not None:
+            args = {"event_id": registration.event_id, "participant_id": registration.participant_id}
+        else:
+            event_id = db.session.scalar(select(Event.event_id).limit(1))
+            if event_id is not None:
+                args = {"event_id": event_id}
+    return args
+
+
+def bench_urls(app, endpoints=None):
+    """[(endpoint, url)] для GET-маршрутов, параметры которых удалось подставить."""
+    args = _sample_args()
+    urls = []
+    with app.test_request_context():
+        from flask import url_for
+        for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+            if "GET" not in rule.methods or rule.endpoint in SKIPPED_ENDPOINTS:
+                continue
+            if endpoints and rule.endpoint not in endpoints:
+                continue
+            if not rule.arguments <= args.keys():
+                continue
+            urls.append((rule.endpoint, url_for(rule.endpoint, **{name: args[name] for name in rule.arguments})))
+    return urls
+
+
+def _timed_get(client, url):
+    _local.statements = 0
+    started = time.perf_counter()
+    response = client.get(url)
+    response.get_data()  # потоковые ответы дочитываются
+    seconds = time.perf_counter() - started
+    statements, _local.statements = _local.statements, None
+    return seconds, statements, response.status_code
+
+
+def run(app, requests=20, concurrency=1, warmup=1, endpoints=None):
+    """Замеряет маршруты и возвращает отчет (словарь для JSON)."""
+    urls = bench_urls(app, endpoints)
+    engines = all_engines(app)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _count_statement)
+    routes = {}
+    started = time.perf_counter()
+    try:
+        for endpoint, url in urls:
+            for _ in range(warmup):
+                _timed_get(app.test_client(), url)
+
+            def worker(count):
+                client = app.test_client()
+                return [_timed_get(client, url) for _ in range(count)]
+
+            shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+            route_started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                samples = [sample for part in executor.map(worker, shares) for sample in part]
+            wall = time.perf_counter() - route_started
+
+            latencies = sorted(seconds * 1000 for seconds, _, _ in samples)
+            routes[endpoint] = {
+                "url": url,
+                "requests": len(samples),
+                "errors": sum(1 for _, _, status in samples if status >= 400),
+                "p50_ms": round(percentile(latencies, 0.50), 2),
+                "p95_ms": round(percentile(latencies, 0.95), 2),
+                "p99_ms": round(percentile(latencies, 0.99), 2),
+                "mean_ms": round(sum(latencies) / len(latencies), 2),
+                "queries_per_request": round(sum(count for _, count, _ in samples) / len(samples), 2),
+                "throughput_rps": round(len(samples) / wall, 1),
+            }
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", _count_statement)
+
+    total_requests = sum(route["requests"] for route in routes.values())
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "database": db.engine.dialect.name,
+        "settings": {"requests": requests, "concurrency": concurrency, "warmup": warmup},
+        "total_requests": total_requests,
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "routes": routes,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(report, path):
+    with open(path, "w", encoding="utf-8") as stream:
+        json.dump(report, stream, ensure_ascii=False, indent=2)
+
+
+def compare(previous, current):
+    """[(endpoint, p95 было, p95 стало, изменение в %)] для маршрутов из обоих отчетов."""
+    rows = []
+    for endpoint, route in current["routes"].items():
+        before = previous["routes"].get(endpoint)
+        if before is None or not before["p95_ms"]:
+            continue
+        change = (route["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+        rows.append((endpoint, before["p95_ms"], route["p95_ms"], round(change, 1)))
+    return rows
@@ -0,0 +1,57 @@
+# app/changes.py
+# Отслеживание изменений таблиц в сессии SQLAlchemy.
+# После успешного commit подписчики получают множество имен измененных таблиц;
+# при rollback изменения забываются. Используется для сброса кэшей.
+from itertools import chain
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_subscribers = []
+
+
+def on_commit(callback):
+    """Регистрирует callback(tables), вызываемый после commit с именами измененных таблиц."""
+    _subscribers.append(callback)
+    return callback
+
+
+def mark_changed(session, *tables):
+    """Отмечает таблицы измененными в обход ORM (например, после COPY)."""
+    session.info.setdefault("changed_tables", set()).update(tables)
+
+
+def changed_tables(session):
+    """Таблицы, измененные в текущей транзакции сессии (до commit)."""
+    return frozenset(session.info.get("changed_tables", ()))
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    mark_changed(session, *{
+        obj.__table__.name
+        for obj in chain(session.new, session.dirty, session.deleted)
+        if hasattr(obj, "__table__")
+    })
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_execute(orm_execute_state):
+    # INSERT/UPDATE/DELETE, выполненные через session.execute()
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            mark_changed(orm_execute_state.session, table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify(session):
+    tables = session.info.pop("changed_tables", None)
+    if tables:
+        for callback in _subscribers:
+            callback(frozenset(tables))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget(session):
+    session.info.pop("changed_tables", None)
@@ -0,0 +1,85 @@
+# app/choices.py
+# Кэш справочников для выпадающих списков форм.
+# Список загружается при первом обращении (только пары id, подпись), живет
+# CHOICES_CACHE_TTL секунд и сбрасывается сразу после commit, изменившего его таблицу.
+# В других процессах сервера изменения становятся видны не позже чем через TTL.
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import select
+
+from . import db
+from .changes import on_commit
+from .models import School, Teacher, Class, Sport, Category, Participant
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def _teacher_label():
+    return (Teacher.first_name + " " + Teacher.last_name).label("label")
+
+
+# Имя списка -> (таблица, функция построения запроса)
+CHOICES = {
+    "schools": ("schools", lambda: select(School.school_id, School.name).order_by(School.name)),
+    "teachers": ("teachers", lambda: select(Teacher.teacher_id, _teacher_label())
+                 .order_by(Teacher.last_name, Teacher.first_name)),
+    "classes": ("classes", lambda: select(Class.class_id, Class.name).order_by(Class.name)),
+    "sports": ("sports", lambda: select(Sport.sport_id, Sport.name).order_by(Sport.name)),
+    "categories": ("categories", lambda: select(Category.category_id, Category.name).order_by(Category.name)),
+}
+
+
+def get_choices(name):
+    now = time.monotonic()
+    cached = _cache.get(name)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    choices = [tuple(row) for row in db.session.execute(CHOICES[name][1]())]
+    with _lock:
+        _cache[name] = (now + current_app.config["CHOICES_CACHE_TTL"], choices)
+    return choices
+
+
+def invalidate(*names):
+    with _lock:
+        for name in names or list(_cache):
+            _cache.pop(name, None)
+
+
+@on_commit
+def _invalidate_changed(tables):
+    invalidate(*[name for name, (table, _) in CHOICES.items() if table in tables])
+
+
+def school_choices():
+    return get_choices("schools")
+
+
+def teacher_choices():
+    return get_choices("teachers")
+
+
+def class_choices():
+    return get_choices("classes")
+
+
+def sport_choices():
+    return get_choices("sports")
+
+
+def category_choices():
+    return get_choices("categories")
+
+
+def participant_choices(participant_ids):
+    """Подписи только для выбранных участников - полный список не загружается."""
+    if not participant_ids:
+        return []
+    return [tuple(row) for row in db.session.execute(
+        select(Participant.participant_id, (Participant.first_name + " " + Participant.last_name))
+        .where(Participant.participant_id.in_(participant_ids))
+    )]
@@ -0,0 +1,209 @@
+# app/commands.py
+import click
+from flask.cli import AppGroup
+
+from . import db
+
+
+def register_commands(app):
+    db_cli = AppGroup("db", help="Схема базы данных.")
+
+    @db_cli.command("upgrade")
+    def db_upgrade():
+        """Применяет недостающие миграции схемы."""
+        from .migrations import upgrade
+        upgrade(echo=click.echo)
+        click.echo("Database schema is up to date")
+
+    @db_cli.command("version")
+    def db_version():
+        """Показывает версию схемы базы и приложения."""
+        from .migrations import LATEST_VERSION, current_version
+        click.echo(f"database: {current_version()}, application: {LATEST_VERSION}")
+
+    @db_cli.command("check-indexes")
+    @click.option("--natural", is_flag=True, help="Не запрещать seq scan, проверить план планировщика.")
+    @click.option("--verbose", is_flag=True, help="Показать планы запросов.")
+    def db_check_indexes(natural, verbose):
+        """Проверяет через EXPLAIN, что основные запросы используют индексы."""
+        from .explain import check_index_usage
+        try:
+            report = check_index_usage(force=not natural)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        failed = 0
+        for description, table, plan, ok in report:
+            click.echo(f"{'ok  ' if ok else 'FAIL'} {description} ({table})")
+            if verbose or not ok:
+                click.echo(plan)
+            failed += not ok
+        if failed:
+            raise click.ClickException(f"Запросов с последовательным чтением таблицы: {failed}")
+
+    app.cli.add_command(db_cli)
+
+    standings_cli = AppGroup("standings", help="Таблица очков школ (school_points).")
+
+    @standings_cli.command("rebuild")
+    @click.option("--event-id", type=int, default=None, help="Пересчитать только одно мероприятие.")
+    def standings_rebuild(event_id):
+        """Пересчитывает school_points по таблице results."""
+        from .standings import rebuild
+        try:
+            rebuild(event_id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        click.echo("school_points rebuilt")
+
+    @standings_cli.command("check")
+    def standings_check():
+        """Сверяет school_points с представлением school_points_view."""
+        from .reporting import materialized_views_enabled, refresh_views
+        from .standings import check
+        if materialized_views_enabled():
+            with db.engine.begin() as connection:
+                refresh_views(connection)
+        mismatches = check()
+        for school_id, field, actual, expected in mismatches:
+            click.echo(f"school_id={school_id}: {field} = {actual}, в представлении {expected}")
+        if mismatches:
+            raise click.ClickException(f"Найдено расхождений: {len(mismatches)}")
+        click.echo("school_points is consistent with school_points_view")
+
+    app.cli.add_command(standings_cli)
+
+    views_cli = AppGroup("views", help="Представления отчетов.")
+
+    @views_cli.command("refresh")
+    def views_refresh():
+        """Обновляет материализованные представления."""
+        from .reporting import materialized_views_enabled, refresh_views
+        if not materialized_views_enabled():
+            raise click.ClickException("Материализованные представления не включены (MATERIALIZED_VIEWS)")
+        with db.engine.begin() as connection:
+            refresh_views(connection)
+        click.echo("Reporting views refreshed")
+
+    @views_cli.command("rebuild")
+    def views_rebuild():
+        """Пересоздает представления в соответствии с MATERIALIZED_VIEWS."""
+        from .migrations import create_views
+        from .reporting import materialized_views_enabled, view_refreshes
+        try:
+            view_refreshes.create(db.session.connection(), checkfirst=True)
+            create_views(materialized=materialized_views_enabled())
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        click.echo("Reporting views rebuilt")
+
+    app.cli.add_command(views_cli)
+
+    results_cli = AppGroup("results", help="Результаты мероприятий.")
+
+    @results_cli.command("rank")
+    @click.option("--event-id", type=int, default=None, help="Пересчитать только одно мероприятие.")
+    def results_rank(event_id):
+        """Пересчитывает места и очки по времени (и очки школ)."""
+        from .models import Result
+        from .ranking import rank_results
+        if event_id is None:
+            event_ids = [row[0] for row in db.session.query(Result.event_id).distinct()]
+        else:
+            event_ids = [event_id]
+        try:
+            for current_event_id in event_ids:
+                rank_results(current_event_id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        click.echo(f"Ranked events: {len(event_ids)}")
+
+    @results_cli.command("qualify")
+    @click.option("--event-id", type=int, default=None, help="Только участники одного мероприятия.")
+    @click.option("--sport-id", type=int, default=None, help="Только один вид спорта.")
+    def results_qualify(event_id, sport_id):
+        """Присваивает разряды по сумме очков в виде спорта."""
+        from .qualification import qualify
+        try:
+            assigned = qualify(event_id, sport_id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        click.echo(f"Ranks assigned: {assigned}")
+
+    app.cli.add_command(results_cli)
+
+    @app.cli.command("import")
+    @click.argument("kind", type=click.Choice(["schools", "teachers", "classes", "participants"]))
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--partial", is_flag=True, help="Загрузить корректные строки, даже если есть ошибки.")
+    def import_command(kind, path, partial):
+        """Импортирует школы, учителей, классы или участников из CSV/XLSX."""
+        from .importer import import_file
+        with open(path, "rb") as stream:
+            try:
+                report = import_file(kind, stream, path, partial=partial)
+            except Exception:
+                db.session.rollback()
+                raise
+        for line, message in report.errors:
+            click.echo(f"Строка {line}: {message}", err=True)
+        if report.errors and not partial:
+            db.session.rollback()
+            raise click.ClickException(f"Ошибок: {len(report.errors)}, ничего не загружено")
+        db.session.commit()
+        click.echo(f"Imported {kind}: {report.inserted}")
+
+    @app.cli.command("seed")
+    @click.option("--schools", default=20, show_default=True)
+    @click.option("--teachers-per-school", default=15, show_default=True)
+    @click.option("--classes-per-school", default=22, show_default=True)
+    @click.option("--participants-per-class", default=25, show_default=True)
+    @click.option("--events", default=50, show_default=True)
+    @click.option("--registrations-per-event", default=200, show_default=True)
+    @click.option("--results-ratio", default=0.9, show_default=True,
+                  help="Доля зарегистрированных, у которых есть результат (для прошедших мероприятий).")
+    @click.option("--random-seed", type=int, default=None, help="Для воспроизводимых данных.")
+    def seed_command(**options):
+        """Генерирует тестовые данные заданного масштаба."""
+        from .seeding import seed
+        try:
+            report = seed(**options)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        for table, count in report.counts.items():
+            click.echo(f"{table}: {count}")
+
+    @app.cli.command("bench")
+    @click.option("--requests", default=20, show_default=True, help="Запросов на маршрут.")
+    @click.option("--concurrency", default=1, show_default=True, help="Параллельных клиентов.")
+    @click.option("--warmup", default=1, show_default=True, help="Запросов на прогрев (не учитываются).")
+    @click.option("--endpoint", "endpoints", multiple=True, help="Замерить только эти маршруты.")
+    @click.option("--output", type=click.Path(dir_okay=False), default="benchmark.json", show_default=True)
+    @click.option("--compare", "compare_path", type=click.Path(exists=True, dir_okay=False), default=None,
+                  help="Предыдущий отчет для сравнения p95.")
+    def bench_command(requests, concurrency, warmup, endpoints, output, compare_path):
+        """Замеряет задержки, количество SQL-запросов и пропускную способность страниц."""
+        import json
+        from .benchmark import compare, run, save
+        report = run(app, requests=requests, concurrency=concurrency, warmup=warmup,
+                     endpoints=set(endpoints))
+        for endpoint, route in report["routes"].items():
+            click.echo(f"{endpoint:24} p50 {route['p50_ms']:8.2f} ms  p95 {route['p95_ms']:8.2f} ms  "
+                       f"p99 {route['p99_ms']:8.2f} ms  {route['queries_per_request']:6.1f} q/req  "
+                       f"{route['throughput_rps']:8.1f} req/s  errors {route['errors']}")
+        save(report, output)
+        click.echo(f"Saved {output}")
+        if compare_path:
+            with open(compare_path, encoding="utf-8") as stream:
+                previous = json.load(stream)
+            for endpoint, before, after, change in compare(previous, report):
+                click.echo(f"{endpoint:24} p95 {before:8.2f} -> {after:8.2f} ms ({change:+.1f}%)")
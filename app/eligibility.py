@@ -0,0 +1,143 @@
+# app/eligibility.py
+# Подбор категорий участникам мероприятия.
+# Категория задает возраст на дату мероприятия и пол. Возрастные границы всех
+# категорий переводятся в границы дат рождения и сортируются; между соседними
+# границами набор подходящих категорий не меняется и считается заранее.
+# Категории всех зарегистрированных участников находятся одним запросом и
+# двоичным поиском даты рождения по границам. Результат хранится по мероприятию
+# ELIGIBILITY_CACHE_TTL секунд и сбрасывается после commit, изменившего
+# категории, участников, мероприятия или регистрации.
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import select
+
+from . import db
+from .changes import on_commit
+from .importer import GENDERS
+from .models import Category, Event, EventParticipant, Participant
+
+# Сколько мероприятий держать в кэше
+CACHE_EVENTS = 64
+
+# Таблицы, изменение которых делает кэш устаревшим
+SOURCE_TABLES = {"categories", "events", "participants", "event_participants"}
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def years_before(day, years):
+    # 29 февраля в невисокосный год заменяется на 28-е
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        return day.replace(year=day.year - years, day=28)
+
+
+class AgeIntervals:
+    """Отсортированные интервалы дат рождения и подходящие для них категории."""
+
+    def __init__(self, event_date, categories):
+        # Категория подходит родившимся в [low, high): от дня после (max_age + 1) лет до min_age лет назад
+        ranges = []
+        for category_id, min_age, max_age, gender in categories:
+            low = years_before(event_date, max_age + 1) + timedelta(days=1)
+            high = years_before(event_date, min_age) + timedelta(days=1)
+            if low < high:
+                ranges.append((low, high, category_id, GENDERS.get((gender or "").upper()),
+                               max_age - min_age))
+        # Сначала категории своего пола, затем более узкие по возрасту
+        ranges.sort(key=lambda item: (item[3] is None, item[4], item[2]))
+
+        self.bounds = sorted({bound for low, high, *_ in ranges for bound in (low, high)})
+        self.segments = []
+        for start in self.bounds[:-1]:
+            matching = [(category_id, gender) for low, high, category_id, gender, _ in ranges
+                        if low <= start < high]
+            self.segments.append({
+                key: tuple(category_id for category_id, gender in matching if gender in (None, key))
+                for key in ("M", "F", None)
+            })
+
+    def categories(self, birth_date, gender):
+        if birth_date is None:
+            return ()
+        index = bisect_right(self.bounds, birth_date) - 1
+        if index < 0 or index >= len(self.segments):
+            return ()
+        return self.segments[index][GENDERS.get((gender or "").upper())]
+
+
+class EventEligibility:
+    def __init__(self, intervals, participants):
+        self.intervals = intervals
+        self.participants = participants
+
+    def categories(self, participant_id):
+        """Подходящие категории участника; первая - предлагаемая по умолчанию."""
+        categories = self.participants.get(participant_id)
+        if categories is None:
+            # Участник зарегистрирован после построения кэша
+            row = db.session.execute(
+                select(Participant.birth_date, Participant.gender)
+                .where(Participant.participant_id == participant_id)
+            ).first()
+            categories = () if row is None else self.intervals.categories(*row)
+        return categories
+
+    def default(self, participant_id):
+        categories = self.categories(participant_id)
+        return categories[0] if categories else None
+
+
+def _build(event_id):
+    event_date = db.session.scalar(select(Event.date).where(Event.event_id == event_id))
+    if event_date is None:
+        return None
+    intervals = AgeIntervals(event_date, db.session.execute(
+        select(Category.category_id, Category.min_age, Category.max_age, Category.gender)
+    ).all())
+    participants = {
+        participant_id: intervals.categories(birth_date, gender)
+        for participant_id, birth_date, gender in db.session.execute(
+            select(Participant.participant_id, Participant.birth_date, Participant.gender)
+            .join(EventParticipant, EventParticipant.participant_id == Participant.participant_id)
+            .where(EventParticipant.event_id == event_id)
+        )
+    }
+    return EventEligibility(intervals, participants)
+
+
+def event_eligibility(event_id):
+    """Категории участников мероприятия (EventEligibility) или None, если мероприятия нет."""
+    now = time.monotonic()
+    with _lock:
+        cached = _cache.get(event_id)
+        if cached is not None and cached[0] > now:
+            _cache.move_to_end(event_id)
+            return cached[1]
+
+    eligibility = _build(event_id)
+    if eligibility is not None:
+        with _lock:
+            _cache[event_id] = (now + current_app.config["ELIGIBILITY_CACHE_TTL"], eligibility)
+            _cache.move_to_end(event_id)
+            while len(_cache) > CACHE_EVENTS:
+                _cache.popitem(last=False)
+    return eligibility
+
+
+def invalidate():
+    with _lock:
+        _cache.clear()
+
+
+@on_commit
+def _invalidate_changed(tables):
+    if tables & SOURCE_TABLES:
+        invalidate()
@@ -0,0 +1,92 @@
+# app/explain.py
+# Проверка планов основных запросов через EXPLAIN (PostgreSQL и SQLite).
+# Для каждого запроса указана таблица, которую он не должен читать
+# последовательным сканированием. По умолчанию seq scan запрещается на время
+# проверки (enable_seqscan = off): на маленькой базе планировщик и так выберет
+# его, а нас интересует, есть ли подходящий индекс. С force=False проверяется
+# план, который планировщик выбирает сам (имеет смысл на большой базе).
+# В SQLite (тесты) используется EXPLAIN QUERY PLAN; таблицы представлений в нем
+# видны под псевдонимами, поэтому проверяется, что план не читает целиком ни
+# одну таблицу.
+import re
+
+from sqlalchemy import func, select
+from sqlalchemy.sql import text
+
+from . import db
+from .models import Event, EventParticipant, Participant, Result, SchoolPoint
+
+
+def _sample_ids():
+    row = db.session.execute(
+        select(Result.event_id, Result.category_id, Result.participant_id, Participant.school_id, Participant.class_id)
+        .join(Participant, Participant.participant_id == Result.participant_id)
+        .limit(1)
+    ).first()
+    if row is None:
+        raise ValueError("В базе нет результатов; сначала загрузите данные")
+    return row
+
+
+def index_checks():
+    """[(описание, таблица, SQL)] для запросов основных страниц."""
+    event_id, category_id, participant_id, school_id, class_id = _sample_ids()
+    checks = [
+        ("event_details: результаты мероприятия", "results",
+         select(Result).where(Result.event_id == event_id)),
+        ("rank_results: места в категории", "results",
+         select(Result.result_id, func.rank().over(
+             partition_by=(Result.event_id, Result.category_id), order_by=Result.time))
+         .where(Result.event_id == event_id, Result.category_id.in_([category_id]))),
+        ("event_details: регистрации", "event_participants",
+         select(EventParticipant).where(EventParticipant.event_id == event_id)),
+        ("add_results: результаты участника", "results",
+         select(Result.result_id).where(Result.participant_id == participant_id)),
+        ("standings.rebuild: очки по мероприятию", "school_points",
+         select(SchoolPoint).where(SchoolPoint.event_id == event_id)),
+        ("events: первая страница по дате", "events",
+         select(Event).order_by(Event.date, Event.event_id).limit(51)),
+        ("participants: первая страница по имени", "participants",
+         select(Participant).order_by(Participant.last_name, Participant.first_name,
+                                      Participant.participant_id).limit(51)),
+        ("participants: участники класса", "participants",
+         select(Participant).where(Participant.class_id == class_id)),
+    ]
+    checks = [
+        (description, table, str(statement.compile(
+            dialect=db.engine.dialect, compile_kwargs={"literal_binds": True})))
+        for description, table, statement in checks
+    ]
+    for table in ("participants", "results"):
+        checks.append((f"school_points_view: соединение с {table}", table,
+                       f"SELECT * FROM public.school_points_view WHERE school_id = {int(school_id)}"))
+    return checks
+
+
+def _explain(connection, sql, force):
+    if connection.dialect.name == "sqlite":
+        return "\n".join(row[3] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+    if force:
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+    return "\n".join(connection.execute(text(f"EXPLAIN {sql}")).scalars())
+
+
+def _full_scan(plan, table, dialect_name):
+    if dialect_name == "sqlite":
+        # "SCAN t USING INDEX ..." - обход индекса; подзапросы и представления не таблицы
+        return any(re.fullmatch(r"SCAN (?!\(|public\.\w+_view$)\S+", line.strip())
+                   for line in plan.splitlines())
+    return f"Seq Scan on {table}" in plan
+
+
+def check_index_usage(force=True):
+    """Возвращает [(описание, таблица, план, ok)] для всех проверок."""
+    dialect_name = db.engine.dialect.name
+    if dialect_name not in ("postgresql", "sqlite"):
+        raise ValueError("Проверка планов поддерживается только для PostgreSQL и SQLite")
+    report = []
+    for description, table, sql in index_checks():
+        with db.engine.begin() as connection:
+            plan = _explain(connection, sql, force)
+        report.append((description, table, plan, not _full_scan(plan, table, dialect_name)))
+    return report
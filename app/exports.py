@@ -0,0 +1,135 @@
+# app/exports.py
+# Выгрузка протоколов в CSV и XLSX.
+# Строки читаются серверным курсором пачками (yield_per) и сразу пишутся в
+# поток ответа (app/tabular.py), поэтому выгрузка сезона результатов не
+# загружается в память целиком. Ответ передается частями (chunked); CSV
+# сжимается gzip, если клиент его принимает.
+import zlib
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from flask import Response, request, stream_with_context
+from sqlalchemy import select
+
+from . import db
+from .models import Category, Class, Event, EventParticipant, Participant, Result, School, Sport
+from .pagination import STREAM_BATCH_SIZE
+from .standings import standings_query
+from .tabular import write_csv, write_xlsx
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def _participant_name():
+    return Participant.first_name + " " + Participant.last_name
+
+
+def _value(value):
+    if isinstance(value, timedelta):
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%d.%m.%Y")
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def event_results(event_id):
+    """(заголовок, запрос) протокола результатов мероприятия."""
+    header = ("Категория", "Место", "Участник", "Школа", "Класс", "Время", "Очки")
+    query = (
+        select(Category.name, Result.place, _participant_name(), School.name, Class.name,
+               Result.time, Result.points)
+        .join(Participant, Participant.participant_id == Result.participant_id)
+        .join(School, School.school_id == Participant.school_id)
+        .join(Class, Class.class_id == Participant.class_id)
+        .join(Category, Category.category_id == Result.category_id)
+        .where(Result.event_id == event_id)
+        .order_by(Category.name, Result.place, Result.result_id)
+    )
+    return header, query
+
+
+def event_registrations(event_id):
+    header = ("Участник", "Школа", "Класс", "Дата рождения", "Пол", "Дата регистрации")
+    query = (
+        select(_participant_name(), School.name, Class.name, Participant.birth_date,
+               Participant.gender, EventParticipant.registration_date)
+        .join(Participant, Participant.participant_id == EventParticipant.participant_id)
+        .join(School, School.school_id == Participant.school_id)
+        .join(Class, Class.class_id == Participant.class_id)
+        .where(EventParticipant.event_id == event_id)
+        .order_by(School.name, Participant.last_name, Participant.first_name, Participant.participant_id)
+    )
+    return header, query
+
+
+def season_results(date_from=None, date_to=None):
+    """Результаты всех мероприятий за период (по умолчанию - все)."""
+    header = ("Дата", "Мероприятие", "Вид спорта", "Категория", "Место", "Участник", "Школа",
+              "Время", "Очки")
+    query = (
+        select(Event.date, Event.name, Sport.name, Category.name, Result.place, _participant_name(),
+               School.name, Result.time, Result.points)
+        .join(Result, Result.event_id == Event.event_id)
+        .join(Sport, Sport.sport_id == Event.sport_id)
+        .join(Participant, Participant.participant_id == Result.participant_id)
+        .join(School, School.school_id == Participant.school_id)
+        .join(Category, Category.category_id == Result.category_id)
+        .order_by(Event.date, Event.event_id, Category.name, Result.place, Result.result_id)
+    )
+    if date_from is not None:
+        query = query.where(Event.date >= date_from)
+    if date_to is not None:
+        query = query.where(Event.date <= date_to)
+    return header, query
+
+
+def school_standings():
+    header = ("Школа", "Мероприятий", "Результатов", "Очки", "Средний балл")
+    standings = standings_query().subquery()
+    # ORDER BY подзапроса не гарантирует порядок строк внешнего запроса
+    query = select(standings.c.school_name, standings.c.events_participated, standings.c.total_results,
+                   standings.c.total_points, standings.c.avg_points) \
+        .order_by(standings.c.total_points.desc(), standings.c.school_name)
+    return header, query
+
+
+def _rows(query):
+    # Серверный курсор: в памяти не больше одной пачки строк
+    for row in db.session.execute(query.execution_options(yield_per=STREAM_BATCH_SIZE)):
+        yield [_value(value) for value in row]
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_response(export, fmt, filename, sheet):
+    """Потоковый ответ с файлом; export - пара (заголовок, запрос)."""
+    header, query = export
+    if fmt == "xlsx":
+        chunks = write_xlsx(header, _rows(query), sheet)
+    else:
+        chunks = write_csv(header, _rows(query))
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}.{fmt}"',
+        "X-Accel-Buffering": "no",
+    }
+    # XLSX уже сжат, повторное сжатие ничего не дает
+    if fmt == "csv":
+        headers["Vary"] = "Accept-Encoding"
+        if "gzip" in request.accept_encodings:
+            chunks = _gzip(chunks)
+            headers["Content-Encoding"] = "gzip"
+    return Response(stream_with_context(chunks), content_type=FORMATS[fmt], headers=headers)
@@ -1,6 +1,7 @@
 # app/forms.py
 from flask_wtf import FlaskForm
-from wtforms import StringField, IntegerField, DateField, FloatField, SelectField, TextAreaField, SubmitField, SelectMultipleField
+from flask_wtf.file import FileField, FileAllowed, FileRequired
+from wtforms import StringField, IntegerField, DateField, FloatField, SelectField, TextAreaField, SubmitField, SelectMultipleField, BooleanField
 from wtforms.validators import DataRequired, Optional, NumberRange, Length, Regexp, ValidationError
 from datetime import datetime
 
@@ -33,10 +34,11 @@ class SportForm(FlaskForm):
     submit = SubmitField('Добавить вид спорта')
 
 class RankForm(FlaskForm):
-    sport_id = SelectField("Sport", coerce=int, validators=[DataRequired()])
-    name = StringField("Name", validators=[DataRequired()])
-    min_points = IntegerField("Min Points", validators=[DataRequired(), NumberRange(min=0)])
-    submit = SubmitField("Add Rank")
+    sport_id = SelectField("Вид спорта", coerce=int, validators=[DataRequired()])
+    name = StringField("Название разряда", validators=[DataRequired(), Length(max=50)])
+    # Сумма очков участника в виде спорта, с которой присваивается разряд
+    min_points = IntegerField("Минимум очков", validators=[DataRequired(), NumberRange(min=0)])
+    submit = SubmitField("Добавить разряд")
 
 class ParticipantRankForm(FlaskForm):
     participant_id = SelectField("Participant", coerce=int, validators=[DataRequired()])
@@ -67,9 +69,8 @@ class EventParticipantForm(FlaskForm):
     submit = SubmitField("Add Event Participant")
 
 class ResultForm(FlaskForm):
+    # Место и очки рассчитываются по времени (app/ranking.py)
     time = StringField('Время (ЧЧ:ММ:СС)', validators=[DataRequired()])
-    points = IntegerField('Очки', validators=[DataRequired()])
-    place = IntegerField('Место', validators=[DataRequired()])
     category_id = SelectField('Категория', coerce=int, validators=[DataRequired()])
 
     def validate_time(self, field):
@@ -80,6 +81,22 @@ class ResultForm(FlaskForm):
         except:
             raise ValidationError('Время должно быть в формате ЧЧ:ММ:СС')
 
+class ResultProtocolForm(FlaskForm):
+    # Строки протокола приходят либо файлом, либо полями таблицы на странице
+    protocol = FileField('Протокол (CSV/XLSX)', validators=[Optional(), FileAllowed(['csv', 'xlsx'], 'Только файлы CSV или XLSX')])
+    submit = SubmitField('Сохранить результаты')
+
+class ImportForm(FlaskForm):
+    kind = SelectField('Данные', choices=[
+        ('schools', 'Школы (name, address, contact_phone)'),
+        ('teachers', 'Учителя (school, first_name, last_name, phone)'),
+        ('classes', 'Классы (school, name, year, teacher)'),
+        ('participants', 'Участники (school, class, first_name, last_name, birth_date, gender)'),
+    ], validators=[DataRequired()])
+    file = FileField('Файл (CSV/XLSX)', validators=[FileRequired(), FileAllowed(['csv', 'xlsx'], 'Только файлы CSV или XLSX')])
+    partial = BooleanField('Загрузить корректные строки, даже если есть ошибки')
+    submit = SubmitField('Импортировать')
+
 class SchoolPointForm(FlaskForm):
     school_id = SelectField("School", coerce=int, validators=[DataRequired()])
     event_id = SelectField("Event", coerce=int, validators=[DataRequired()])
@@ -90,7 +107,8 @@ class CategoryForm(FlaskForm):
     name = StringField('Название категории', validators=[DataRequired()])
     min_age = IntegerField('Минимальный возраст', validators=[DataRequired()])
     max_age = IntegerField('Максимальный возраст', validators=[DataRequired()])
-    gender = SelectField('Пол', choices=[('', 'Любой'), ('М', 'Мужской'), ('Ж', 'Женский')])
+    # Те же значения, что у участников (ParticipantForm)
+    gender = SelectField('Пол', choices=[('', 'Любой'), ('M', 'Мужской'), ('F', 'Женский')])
     submit = SubmitField('Добавить')
 
 class LogForm(FlaskForm):
@@ -105,6 +123,13 @@ class EventCreationForm(FlaskForm):
     sport_id = SelectField('Вид спорта', coerce=int, validators=[DataRequired()])
     responsible_id = SelectField('Ответственный', coerce=int, validators=[DataRequired()])
     distance = StringField('Дистанция', validators=[Optional(), Length(max=50)])
-    participants = SelectMultipleField('Участники', coerce=int, validators=[DataRequired()])
+    participants = SelectMultipleField('Участники', coerce=int)
+    classes = SelectMultipleField('Классы целиком', coerce=int, validators=[Optional()])
+    schools = SelectMultipleField('Школы целиком', coerce=int, validators=[Optional()])
     categories = SelectMultipleField('Категории', coerce=int, validators=[DataRequired()])
-    submit = SubmitField('Создать мероприятие')
\ No newline at end of file
+    by_categories = BooleanField('Регистрировать только подходящих по категориям')
+    submit = SubmitField('Создать мероприятие')
+
+    def validate_participants(self, field):
+        if not (field.data or self.classes.data or self.schools.data or self.by_categories.data):
+            raise ValidationError('Выберите участников, классы, школы или регистрацию по категориям')
@@ -0,0 +1,198 @@
+# app/fragments.py
+# Кэш отрендеренных фрагментов страниц (таблицы результатов и регистраций
+# мероприятия, таблица очков школ).
+# Фрагменты хранятся в памяти процесса (LRU с ограничением по объему) или, если
+# задан FRAGMENT_CACHE_URL=unix:/путь/к/сокету, в memcached на локальном сокете,
+# общем для всех процессов сервера. Кэш в памяти сбрасывается только в своем
+# процессе, поэтому при нескольких процессах (WEB_CONCURRENCY > 1) по умолчанию
+# используется memcached на стандартном сокете, а если его нет - кэш отключается.
+# Фрагменты мероприятия сбрасываются после commit, изменившего его результаты
+# или регистрации; записи в любом случае живут не дольше FRAGMENT_CACHE_TTL секунд.
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from markupsafe import Markup
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import db
+from .changes import on_commit
+
+STANDINGS_KEY = "standings"
+
+# memcached по умолчанию для нескольких процессов сервера
+DEFAULT_MEMCACHED_URL = "unix:/run/memcached/memcached.sock"
+
+
+def event_keys(event_id):
+    return (f"event:{event_id}:results", f"event:{event_id}:registrations")
+
+
+class MemoryBackend:
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                self._remove(key)
+                return None
+            self._items.move_to_end(key)
+            return value.decode()
+
+    def set(self, key, value):
+        value = value.encode()
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._items)))
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    def _remove(self, key):
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.size -= len(item[1])
+
+
+class MemcachedBackend:
+    """Клиент текстового протокола memcached через unix-сокет.
+
+    Ошибки соединения не ломают страницу: get считается промахом, а set/delete
+    пропускаются с сообщением в лог.
+    """
+
+    def __init__(self, path, ttl, prefix="fragment:", timeout=0.5):
+        self.path = path
+        self.ttl = ttl
+        self.prefix = prefix
+        self.timeout = timeout
+
+    def _call(self, request, read_value=False):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            sock.sendall(request)
+            reader = sock.makefile("rb")
+            line = reader.readline()
+            if not read_value or not line.startswith(b"VALUE "):
+                return line.strip(), None
+            length = int(line.split()[3])
+            value = reader.read(length + 2)[:-2]
+            reader.readline()  # END
+            return b"VALUE", value
+
+    def get(self, key):
+        try:
+            _, value = self._call(f"get {self.prefix}{key}\r\n".encode(), read_value=True)
+        except OSError as e:
+            print(f"Fragment cache get failed: {e}")
+            return None
+        return value.decode() if value is not None else None
+
+    def set(self, key, value):
+        value = value.encode()
+        try:
+            self._call(f"set {self.prefix}{key} 0 {self.ttl} {len(value)}\r\n".encode() + value + b"\r\n")
+        except OSError as e:
+            print(f"Fragment cache set failed: {e}")
+
+    def delete(self, *keys):
+        for key in keys:
+            try:
+                self._call(f"delete {self.prefix}{key}\r\n".encode())
+            except OSError as e:
+                print(f"Fragment cache delete failed: {e}")
+
+
+class DisabledBackend:
+    """Кэш отключен: фрагменты рендерятся при каждом запросе."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+
+def init_fragment_cache(app):
+    url = app.config["FRAGMENT_CACHE_URL"]
+    ttl = app.config["FRAGMENT_CACHE_TTL"]
+    if not url and app.config["WEB_CONCURRENCY"] > 1:
+        if os.path.exists(DEFAULT_MEMCACHED_URL[len("unix:"):]):
+            url = DEFAULT_MEMCACHED_URL
+        else:
+            print(f"Fragment cache disabled: {app.config['WEB_CONCURRENCY']} server processes "
+                  f"need memcached (FRAGMENT_CACHE_URL)")
+            app.extensions["fragment_cache"] = DisabledBackend()
+            return
+    if url.startswith("unix:"):
+        backend = MemcachedBackend(url[len("unix:"):], ttl)
+    else:
+        backend = MemoryBackend(app.config["FRAGMENT_CACHE_BYTES"], ttl)
+    app.extensions["fragment_cache"] = backend
+
+
+def fragment(key, render):
+    """HTML фрагмента из кэша; при промахе вызывает render() и сохраняет результат."""
+    backend = current_app.extensions["fragment_cache"]
+    html = backend.get(key)
+    if html is None:
+        html = render()
+        backend.set(key, html)
+    return Markup(html)
+
+
+def invalidate(*keys):
+    """Сбрасывает фрагменты после commit текущей транзакции."""
+    db.session.info.setdefault("fragments", set()).update(keys)
+
+
+def invalidate_event(event_id):
+    invalidate(*event_keys(event_id), STANDINGS_KEY)
+
+
+def _delete_now(*keys):
+    if has_app_context() and "fragment_cache" in current_app.extensions:
+        current_app.extensions["fragment_cache"].delete(*keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _delete(session):
+    keys = session.info.pop("fragments", None)
+    if keys:
+        _delete_now(*keys)
+
+
+@on_commit
+def _invalidate_standings(tables):
+    # Таблица очков выводит все школы, в том числе без результатов
+    if "schools" in tables:
+        _delete_now(STANDINGS_KEY)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget(session):
+    session.info.pop("fragments", None)
@@ -0,0 +1,181 @@
+# app/http_cache.py
+# HTTP-кэширование страниц списков по версиям таблиц.
+# У каждой таблицы есть счетчик версий в таблице table_versions, который
+# увеличивается в той же транзакции, что и изменение таблицы (перед commit, см.
+# changes.py), поэтому версии общие для всех процессов сервера и CLI-команд.
+# Страница, объявившая через @cached_page(...) таблицы, которые она читает,
+# получает ETag и Last-Modified по их версиям (один SELECT) и отвечает 304 без
+# запросов данных и Jinja. Отрендеренные страницы хранятся в памяти процесса с
+# ключом по тем же версиям, поэтому изменение в другом процессе не отдается из
+# устаревшего кэша. Версии читаются из основной базы; если запрос читает с
+# реплики, которая их еще не получила, страница строится по основной базе.
+# Цена общих версий: строка таблицы в table_versions блокируется до commit, и
+# транзакции, изменившие одну таблицу, фиксируются по очереди (см. bump_versions).
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, has_app_context, make_response, request, session
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, event, inspect, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from . import db
+from .changes import changed_tables
+from .replicas import reads_from_replica, use_primary
+
+table_versions = Table(
+    "table_versions", MetaData(schema="public"),
+    Column("table_name", String(100), primary_key=True),
+    Column("version", Integer, nullable=False),
+    Column("modified_at", DateTime(timezone=True), nullable=False),
+)
+
+# Таблицы, которые еще не изменялись, считаются измененными при старте процесса
+_started = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+class PageCache:
+    """Версии таблиц и отрендеренные страницы одного приложения."""
+
+    def __init__(self, enabled, size):
+        # Таблица table_versions есть в базе (схема обновлена); иначе страницы не кэшируются
+        self.enabled = enabled
+        self.size = size
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._pages.get(key)
+            if body is not None:
+                self._pages.move_to_end(key)
+            return body
+
+    def set(self, key, body):
+        with self._lock:
+            self._pages[key] = body
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.size:
+                self._pages.popitem(last=False)
+
+
+def _page_cache():
+    if not has_app_context():
+        return None
+    cache = current_app.extensions.get("http_cache")
+    return cache if cache is not None and cache.enabled else None
+
+
+def bump_versions(connection, tables):
+    """Увеличивает версии таблиц в транзакции connection.
+
+    Строка таблицы блокируется до commit, поэтому транзакции, изменившие одну
+    и ту же таблицу, фиксируются по очереди. Обновление выполняется последним
+    запросом перед commit, так что блокировка держится только на время commit.
+    """
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    insert = sqlite_insert if connection.dialect.name == "sqlite" else pg_insert
+    stmt = insert(table_versions)
+    connection.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table_versions.c.table_name],
+            set_={"version": table_versions.c.version + 1, "modified_at": stmt.excluded.modified_at},
+        ),
+        [{"table_name": table, "version": 1, "modified_at": now} for table in sorted(tables)]
+    )
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_changed(session):
+    if _page_cache() is None:
+        return
+    # Изменения, еще не отправленные в базу, тоже должны попасть в changed_tables
+    session.flush()
+    tables = changed_tables(session)
+    if tables:
+        # Запись идет в основную базу, даже если сессия читает с реплики
+        bump_versions(session.connection(bind_arguments={"clause": table_versions.insert()}), tables)
+
+
+def _versions(tables, primary=True):
+    """{таблица: (версия, время изменения)} одним запросом (по умолчанию - из основной базы)."""
+    rows = db.session.execute(
+        select(table_versions.c.table_name, table_versions.c.version, table_versions.c.modified_at)
+        .where(table_versions.c.table_name.in_(tables)),
+        bind_arguments={"bind": db.engine} if primary else None
+    )
+    # SQLite не хранит часовой пояс
+    known = {name: (version, modified if modified.tzinfo else modified.replace(tzinfo=timezone.utc))
+             for name, version, modified in rows}
+    return {table: known.get(table, (0, _started)) for table in sorted(tables)}
+
+
+def _etag(versions):
+    key = ":".join(f"{table}={version}@{modified:%Y%m%d%H%M%S}" for table, (version, modified) in versions.items())
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def etag_for(tables):
+    """ETag по версиям таблиц; None, если схема не обновлена и версий нет."""
+    return _etag(_versions(tables)) if _page_cache() is not None else None
+
+
+def read_fresh(tables, etag):
+    """Перед построением ответа с ETag: реплика, еще не получившая эти версии
+    таблиц, отдала бы старые данные под новым ETag (и они попали бы в кэш),
+    поэтому такой запрос читает из основной базы."""
+    if reads_from_replica() and _etag(_versions(tables, primary=False)) != etag:
+        use_primary()
+
+
+def cached_page(*tables):
+    """Декоратор GET-страницы, которая читает только перечисленные таблицы."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Непоказанные flash-сообщения выводятся на странице, ее нельзя отдавать из кэша
+            cache = _page_cache()
+            if cache is None or session.get("_flashes"):
+                return view(*args, **kwargs)
+
+            versions = _versions(tables)
+            etag = _etag(versions)
+            modified = max(modified for version, modified in versions.values())
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                not_modified = (request.if_modified_since is not None
+                                and request.if_modified_since >= modified)
+
+            if not_modified:
+                response = make_response("", 304)
+            else:
+                key = (request.full_path, etag)
+                body = cache.get(key)
+                if body is None:
+                    read_fresh(tables, etag)
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    # Потоковые ответы (stream_template) и страницы с flash-сообщением
+                    # не кэшируются
+                    if not response.is_streamed and not session.modified:
+                        cache.set(key, response.get_data())
+                else:
+                    response = make_response(body)
+            response.set_etag(etag)
+            response.last_modified = modified
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+
+def init_http_cache(app):
+    enabled = inspect(db.engine).has_table(table_versions.name, schema=table_versions.schema)
+    app.extensions["http_cache"] = PageCache(enabled, app.config["PAGE_CACHE_SIZE"])
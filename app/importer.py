@@ -0,0 +1,252 @@
+# app/importer.py
+# Массовый импорт школ, учителей, классов и участников из CSV/XLSX.
+# Названия школ, классов и учителей разрешаются в id по справочникам, загруженным
+# один раз перед импортом. Строки читаются потоком и загружаются в PostgreSQL
+# через COPY FROM STDIN, в остальных базах - многострочными INSERT пачками.
+import csv
+import io
+from datetime import date, datetime
+
+from sqlalchemy import insert, select
+
+from . import db
+from .changes import mark_changed
+from .models import School, Teacher, Class, Participant
+from .tabular import read_rows
+
+INSERT_BATCH_SIZE = 1000
+
+GENDERS = {"M": "M", "F": "F", "М": "M", "Ж": "F"}
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+class ImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.errors = []
+
+    @property
+    def ok(self):
+        return not self.errors
+
+
+class Lookups:
+    """Справочники для разрешения названий в id; каждый загружается одним запросом."""
+
+    def __init__(self):
+        self.schools = dict(db.session.execute(select(School.name, School.school_id)).all())
+        self.classes = {
+            (school_id, name): class_id
+            for class_id, school_id, name in db.session.execute(
+                select(Class.class_id, Class.school_id, Class.name)
+            )
+        }
+        self.teachers = {}
+        for teacher_id, school_id, first_name, last_name in db.session.execute(
+                select(Teacher.teacher_id, Teacher.school_id, Teacher.first_name, Teacher.last_name)
+        ):
+            self.teachers.setdefault((school_id, f"{first_name} {last_name}"), teacher_id)
+
+    def school_id(self, name):
+        try:
+            return self.schools[name]
+        except KeyError:
+            raise ImportRowError(f"Школа не найдена: {name}")
+
+    def class_id(self, school_id, name):
+        try:
+            return self.classes[(school_id, name)]
+        except KeyError:
+            raise ImportRowError(f"Класс не найден: {name}")
+
+    def teacher_id(self, school_id, full_name):
+        try:
+            return self.teachers[(school_id, " ".join(full_name.split()))]
+        except KeyError:
+            raise ImportRowError(f"Учитель не найден: {full_name}")
+
+
+def _required(raw, name):
+    value = (raw.get(name) or "").strip()
+    if not value:
+        raise ImportRowError(f"Не заполнено поле {name}")
+    return value
+
+
+def _optional(raw, name):
+    return (raw.get(name) or "").strip() or None
+
+
+def _parse_date(value):
+    # XLSX отдает даты как "ГГГГ-ММ-ДД ЧЧ:ММ:СС"
+    for fmt in ("%Y-%m-%d", "%d.%m.%Y"):
+        try:
+            return datetime.strptime(value[:10], fmt).date()
+        except ValueError:
+            pass
+    raise ImportRowError(f"Некорректная дата: {value}")
+
+
+def _school_row(raw, lookups, seen):
+    name = _required(raw, "name")
+    # uix: schools.name
+    if name in lookups.schools or name in seen:
+        raise ImportRowError(f"Школа уже существует: {name}")
+    seen.add(name)
+    return {"name": name, "address": _optional(raw, "address"),
+            "contact_phone": _optional(raw, "contact_phone")}
+
+
+def _teacher_row(raw, lookups, seen):
+    return {
+        "school_id": lookups.school_id(_required(raw, "school")),
+        "first_name": _required(raw, "first_name"),
+        "last_name": _required(raw, "last_name"),
+        "phone": _optional(raw, "phone"),
+    }
+
+
+def _class_row(raw, lookups, seen):
+    school_id = lookups.school_id(_required(raw, "school"))
+    name = _required(raw, "name")
+    # uix_school_name: (school_id, name)
+    if (school_id, name) in lookups.classes or (school_id, name) in seen:
+        raise ImportRowError(f"Класс {name} уже существует в этой школе")
+    seen.add((school_id, name))
+    year = _optional(raw, "year")
+    try:
+        year = int(float(year)) if year else None
+    except ValueError:
+        raise ImportRowError(f"Некорректный год: {year}")
+    return {
+        "school_id": school_id,
+        "name": name,
+        "year": year,
+        "teacher_id": lookups.teacher_id(school_id, _required(raw, "teacher")),
+    }
+
+
+def _participant_row(raw, lookups, seen):
+    school_id = lookups.school_id(_required(raw, "school"))
+    gender = _required(raw, "gender").upper()
+    if gender not in GENDERS:
+        raise ImportRowError(f"Некорректный пол: {gender}")
+    return {
+        "school_id": school_id,
+        "class_id": lookups.class_id(school_id, _required(raw, "class")),
+        "first_name": _required(raw, "first_name"),
+        "last_name": _required(raw, "last_name"),
+        "birth_date": _parse_date(_required(raw, "birth_date")),
+        "gender": GENDERS[gender],
+    }
+
+
+IMPORTERS = {
+    "schools": (School.__table__, ("name", "address", "contact_phone"), _school_row),
+    "teachers": (Teacher.__table__, ("school_id", "first_name", "last_name", "phone"), _teacher_row),
+    "classes": (Class.__table__, ("school_id", "name", "year", "teacher_id"), _class_row),
+    "participants": (Participant.__table__,
+                     ("school_id", "class_id", "first_name", "last_name", "birth_date", "gender"),
+                     _participant_row),
+}
+
+
+class _CopyStream(io.TextIOBase):
+    """Файлоподобный объект для copy_expert: отдает строки CSV по мере чтения."""
+
+    def __init__(self, rows, columns):
+        self._rows = rows
+        self._columns = columns
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._pending = ""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._pending) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow([
+                "\\N" if row[column] is None else
+                row[column].isoformat() if isinstance(row[column], date) else row[column]
+                for column in self._columns
+            ])
+            self._pending += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+        if size < 0:
+            size = len(self._pending)
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+
+def _copy(table, columns, rows):
+    sql = (f"COPY {table.schema}.{table.name} ({', '.join(columns)}) "
+           f"FROM STDIN WITH (FORMAT csv, NULL '\\N')")
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(sql, _CopyStream(rows, columns))
+    finally:
+        cursor.close()
+    # COPY идет в обход сессии, поэтому об изменении таблицы сообщаем явно
+    mark_changed(db.session, table.name)
+
+
+def _insert_batches(table, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            db.session.execute(insert(table), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(table), batch)
+
+
+def bulk_insert(table, columns, rows):
+    """Загружает строки-словари: COPY в PostgreSQL, пачки INSERT в остальных базах."""
+    if db.engine.dialect.name == "postgresql":
+        _copy(table, columns, rows)
+    else:
+        _insert_batches(table, rows)
+
+
+def import_rows(kind, raw_rows, partial=False):
+    """Импортирует строки (номер строки, словарь) в таблицу kind.
+
+    Строки с ошибками пропускаются и попадают в report.errors. Если partial=False
+    и ошибки есть, вызывающий код должен откатить транзакцию; commit тоже делает он.
+    """
+    table, columns, build_row = IMPORTERS[kind]
+    lookups = Lookups()
+    report = ImportReport()
+    seen = set()
+
+    def valid_rows():
+        for line, raw in raw_rows:
+            try:
+                row = build_row(raw, lookups, seen)
+            except ImportRowError as e:
+                report.errors.append((line, str(e)))
+                continue
+            # Без partial после первой ошибки строки уже не загружаются
+            if report.errors and not partial:
+                continue
+            report.inserted += 1
+            yield row
+
+    bulk_insert(table, columns, valid_rows())
+
+    if report.errors and not partial:
+        report.inserted = 0
+    return report
+
+
+def import_file(kind, stream, filename, partial=False):
+    return import_rows(kind, read_rows(stream, filename), partial=partial)
@@ -0,0 +1,257 @@
+# app/live.py
+# Трансляция результатов мероприятия зрителям (server-sent events).
+# После commit, изменившего результаты (rank_results), публикуется уведомление
+# (мероприятие, категории). В PostgreSQL оно отправляется через NOTIFY в той же
+# транзакции, и каждый процесс сервера держит одно соединение с LISTEN; в
+# остальных базах уведомление передается внутри процесса. Соединение с LISTEN
+# открывается при первом зрителе в процессе (после fork воркера gunicorn).
+# На каждое мероприятие, у которого есть зрители, заводится один канал: он
+# хранит последний снимок результатов, по уведомлению читает затронутые
+# категории одним запросом и рассылает зрителям только новые и измененные строки.
+# Поток одного зрителя длится не дольше LIVE_STREAM_SECONDS: при синхронных
+# воркерах он занимает воркер целиком. Браузер переподключается через 3 с
+# (retry) и получает снимок результатов.
+import json
+import queue
+import select as select_module
+import threading
+import time
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from . import db
+from .models import Result, Participant, Category, School, Class, format_time
+
+CHANNEL = "event_results"
+# Интервал пустых сообщений, чтобы прокси не закрывали соединение, секунд
+KEEPALIVE_SECONDS = 15
+
+
+def _result_rows(event_id, category_ids=None):
+    participant_name = Participant.first_name + " " + Participant.last_name
+    query = (
+        select(Result.result_id, participant_name, School.name, Class.name, Category.name,
+               Result.time, Result.points, Result.place)
+        .join(Participant, Participant.participant_id == Result.participant_id)
+        .join(School, School.school_id == Participant.school_id)
+        .join(Class, Class.class_id == Participant.class_id)
+        .join(Category, Category.category_id == Result.category_id)
+        .where(Result.event_id == event_id)
+    )
+    if category_ids is not None:
+        query = query.where(Result.category_id.in_(category_ids))
+    rows = {}
+    for result_id, participant, school, class_name, category, time, points, place in db.session.execute(query):
+        rows[result_id] = {
+            "result_id": result_id,
+            "participant": participant,
+            "school": school,
+            "class": class_name,
+            "category": category,
+            "time": format_time(time),
+            "points": points,
+            "place": place,
+        }
+    return rows
+
+
+class EventChannel:
+    """Подписчики одного мероприятия и снимок его результатов."""
+
+    def __init__(self, app, event_id):
+        self.app = app
+        self.event_id = event_id
+        self.subscribers = set()
+        self.snapshot = None
+        self._pending = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"live-event-{event_id}", daemon=True)
+        self._thread.start()
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=100)
+        with self._lock:
+            self.subscribers.add(subscriber)
+            if self.snapshot is not None:
+                subscriber.put_nowait(("snapshot", list(self.snapshot.values())))
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self.subscribers.discard(subscriber)
+            return not self.subscribers
+
+    def notify(self, category_ids):
+        self._pending.put(category_ids)
+
+    def close(self):
+        self._pending.put(StopIteration)
+
+    def _broadcast(self, kind, rows):
+        with self._lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((kind, rows))
+            except queue.Full:
+                # Зритель не успевает читать - пропускает обновление, при переподключении получит снимок
+                pass
+
+    def _run(self):
+        with self.app.app_context():
+            self.snapshot = _result_rows(self.event_id)
+            db.session.remove()
+        self._broadcast("snapshot", list(self.snapshot.values()))
+
+        while True:
+            category_ids = self._pending.get()
+            if category_ids is StopIteration:
+                return
+            # Несколько уведомлений подряд объединяются в один запрос
+            while not self._pending.empty():
+                more = self._pending.get_nowait()
+                if more is StopIteration:
+                    return
+                category_ids = None if category_ids is None or more is None else category_ids | more
+
+            with self.app.app_context():
+                rows = _result_rows(self.event_id, category_ids)
+                db.session.remove()
+            # Результаты не удаляются, поэтому достаточно найти новые и измененные строки
+            changed = []
+            with self._lock:
+                for result_id, row in rows.items():
+                    if self.snapshot.get(result_id) != row:
+                        self.snapshot[result_id] = row
+                        changed.append(row)
+            if changed:
+                self._broadcast("results", changed)
+
+
+class Broker:
+    def __init__(self, app, engine):
+        self.app = app
+        self.engine = engine
+        self.channels = {}
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def _start_listener(self):
+        # Поток создается в процессе, где есть зрители: поток, запущенный в create_app,
+        # не пережил бы fork воркеров (gunicorn --preload)
+        if self._listener is None and self.engine.dialect.name == "postgresql":
+            self._listener = threading.Thread(target=_listen, args=(self.engine, self),
+                                              name="live-listener", daemon=True)
+            self._listener.start()
+
+    def subscribe(self, event_id):
+        with self._lock:
+            self._start_listener()
+            channel = self.channels.get(event_id)
+            if channel is None:
+                channel = self.channels[event_id] = EventChannel(self.app, event_id)
+            return channel, channel.subscribe()
+
+    def unsubscribe(self, channel, subscriber):
+        with self._lock:
+            if channel.unsubscribe(subscriber) and self.channels.get(channel.event_id) is channel:
+                del self.channels[channel.event_id]
+                channel.close()
+
+    def publish(self, event_id, category_ids):
+        with self._lock:
+            channel = self.channels.get(event_id)
+        if channel is not None:
+            channel.notify(category_ids)
+
+
+_broker = None
+
+
+def notify_results(event_id, category_ids=None):
+    """Отмечает, что результаты мероприятия (категорий) изменились; публикуется при commit."""
+    pending = db.session.info.setdefault("live_results", {})
+    if category_ids is None or (event_id in pending and pending[event_id] is None):
+        pending[event_id] = None
+    else:
+        pending[event_id] = pending.get(event_id, set()) | set(category_ids)
+
+
+def _payload(event_id, category_ids):
+    return json.dumps({"event_id": event_id,
+                       "category_ids": None if category_ids is None else sorted(category_ids)})
+
+
+@event.listens_for(Session, "before_commit")
+def _send_notify(session):
+    # NOTIFY транзакционный: слушатели получат его только после commit
+    pending = session.info.get("live_results")
+    if pending and session.get_bind().dialect.name == "postgresql":
+        for event_id, category_ids in pending.items():
+            session.execute(select(func.pg_notify(CHANNEL, _payload(event_id, category_ids))))
+        session.info.pop("live_results")
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_local(session):
+    pending = session.info.pop("live_results", None)
+    if pending and _broker is not None:
+        for event_id, category_ids in pending.items():
+            _broker.publish(event_id, category_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget(session):
+    session.info.pop("live_results", None)
+
+
+def _listen(engine, broker):
+    """Одно соединение с LISTEN на процесс; уведомления передаются каналам мероприятий."""
+    while True:
+        try:
+            connection = engine.raw_connection()
+            try:
+                dbapi_connection = connection.dbapi_connection
+                dbapi_connection.autocommit = True
+                dbapi_connection.cursor().execute(f"LISTEN {CHANNEL}")
+                while True:
+                    if select_module.select([dbapi_connection], [], [], KEEPALIVE_SECONDS) == ([], [], []):
+                        continue
+                    dbapi_connection.poll()
+                    while dbapi_connection.notifies:
+                        notify = json.loads(dbapi_connection.notifies.pop(0).payload)
+                        category_ids = notify["category_ids"]
+                        broker.publish(notify["event_id"], None if category_ids is None else set(category_ids))
+            finally:
+                connection.invalidate()
+        except Exception as e:
+            print(f"Live results listener error: {e}")
+            threading.Event().wait(5)
+
+
+def init_live(app):
+    global _broker
+    _broker = Broker(app, db.engine)
+    app.extensions["live_results"] = _broker
+
+
+def stream(event_id, max_seconds):
+    """Генератор сообщений text/event-stream для зрителя мероприятия; завершается
+    через max_seconds, после чего браузер переподключается."""
+    channel, subscriber = _broker.subscribe(event_id)
+    deadline = time.monotonic() + max_seconds
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                kind, rows = subscriber.get(timeout=min(KEEPALIVE_SECONDS, remaining))
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {kind}\ndata: {json.dumps(rows, ensure_ascii=False)}\n\n"
+    finally:
+        _broker.unsubscribe(channel, subscriber)
@@ -0,0 +1,113 @@
+# app/log_writer.py
+# Фоновая запись в таблицу logs.
+# Записи складываются в ограниченную очередь в памяти процесса, фоновый поток
+# забирает их пачками и вставляет одним многострочным INSERT не реже чем раз
+# в flush_interval секунд или при накоплении batch_size записей.
+#
+# Переполнение: если очередь заполнена, submit ждет не дольше block_timeout
+# секунд (0 - не ждет) и отбрасывает запись, увеличивая счетчик dropped.
+# Остановка: close() (вызывается и при выходе из процесса) дописывает все, что
+# уже в очереди; записи, поставленные после close(), отбрасываются. Пачка, которую
+# не удалось вставить из-за ошибки базы, теряется с сообщением в лог.
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+
+from . import db
+from .models import Log
+
+
+class LogWriter:
+    def __init__(self, engine, max_queue=10000, batch_size=500, flush_interval=1.0, block_timeout=0):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.written = 0
+        self._counters_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, action, user_id=None):
+        """Ставит запись в очередь; возвращает False, если запись отброшена."""
+        if not self._stop.is_set():
+            try:
+                self._queue.put({
+                    "action": action[:200],
+                    "user_id": user_id,
+                    "timestamp": datetime.now(),
+                }, block=self.block_timeout > 0, timeout=self.block_timeout or None)
+                return True
+            except queue.Full:
+                pass
+        with self._counters_lock:
+            self.dropped += 1
+            if self.dropped == 1:
+                print("Warning: log queue is full or closed, entries are being dropped")
+        return False
+
+    def _take_batch(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(Log.__table__.insert(), batch)
+            with self._counters_lock:
+                self.written += len(batch)
+        except Exception as e:
+            print(f"Failed to write {len(batch)} log entries: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._take_batch()
+            if batch:
+                self._write(batch)
+
+    def close(self):
+        """Останавливает поток и записывает все, что осталось в очереди."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for start in range(0, len(batch), self.batch_size):
+            self._write(batch[start:start + self.batch_size])
+        if self.dropped:
+            print(f"Log writer closed: {self.written} written, {self.dropped} dropped")
+
+
+def get_log_writer(app):
+    """Общий для приложения LogWriter; поток запускается при первом обращении."""
+    writer = app.extensions.get("log_writer")
+    if writer is None:
+        writer = LogWriter(
+            db.engine,
+            max_queue=app.config["LOG_QUEUE_SIZE"],
+            batch_size=app.config["LOG_BATCH_SIZE"],
+            flush_interval=app.config["LOG_FLUSH_MS"] / 1000,
+            block_timeout=app.config["LOG_BLOCK_MS"] / 1000,
+        )
+        app.extensions["log_writer"] = writer
+    return writer
@@ -0,0 +1,107 @@
+# app/metrics.py
+# Метрики пула соединений с базой в текстовом формате Prometheus (/metrics).
+# Значения считаются в пределах одного процесса сервера.
+import threading
+import time
+
+from flask import Response
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from . import db
+
+# Границы корзин гистограммы ожидания соединения, секунд
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * len(WAIT_BUCKETS)
+
+    def observe_wait(self, seconds, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.checkout_timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_sum += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.wait_buckets[i] += 1
+
+    def count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool, который замеряет время получения соединения из пула."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.observe_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.observe_wait(time.perf_counter() - started)
+        return connection
+
+
+def _render():
+    pool = db.engine.pool
+    lines = [
+        "# TYPE db_pool_checkout_wait_seconds histogram",
+    ]
+    with pool_metrics._lock:
+        for bound, count in zip(WAIT_BUCKETS, pool_metrics.wait_buckets):
+            lines.append(f'db_pool_checkout_wait_seconds_bucket{{le="{bound}"}} {count}')
+        lines += [
+            f'db_pool_checkout_wait_seconds_bucket{{le="+Inf"}} {pool_metrics.checkouts}',
+            f"db_pool_checkout_wait_seconds_sum {pool_metrics.wait_sum:.6f}",
+            f"db_pool_checkout_wait_seconds_count {pool_metrics.checkouts}",
+            "# TYPE db_pool_checkout_wait_max_seconds gauge",
+            f"db_pool_checkout_wait_max_seconds {pool_metrics.wait_max:.6f}",
+            "# TYPE db_pool_checkout_timeouts_total counter",
+            f"db_pool_checkout_timeouts_total {pool_metrics.checkout_timeouts}",
+            "# TYPE db_pool_connects_total counter",
+            f"db_pool_connects_total {pool_metrics.connects}",
+            "# TYPE db_pool_invalidations_total counter",
+            f"db_pool_invalidations_total {pool_metrics.invalidations}",
+        ]
+
+    # Заполненность пула есть только у QueuePool; у NullPool соединения не хранятся
+    if isinstance(pool, QueuePool):
+        lines += [
+            "# TYPE db_pool_size gauge",
+            f"db_pool_size {pool.size()}",
+            "# TYPE db_pool_checked_out gauge",
+            f"db_pool_checked_out {pool.checkedout()}",
+            "# TYPE db_pool_checked_in gauge",
+            f"db_pool_checked_in {pool.checkedin()}",
+            "# TYPE db_pool_overflow gauge",
+            f"db_pool_overflow {max(pool.overflow(), 0)}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def init_metrics(app):
+    event.listen(db.engine, "connect", lambda dbapi_connection, record: pool_metrics.count("connects"))
+    event.listen(db.engine, "invalidate",
+                 lambda dbapi_connection, record, exception: pool_metrics.count("invalidations"))
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(_render(), mimetype="text/plain; version=0.0.4")
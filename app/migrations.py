@@ -0,0 +1,211 @@
+# app/migrations.py
+# Версионированные изменения схемы базы данных.
+# Миграции применяются командой "flask db upgrade" один раз при развертывании;
+# при старте приложения выполняется только проверка версии схемы (один SELECT).
+# Каждая миграция идемпотентна, поэтому их можно применить и к базе, созданной
+# до появления таблицы schema_version.
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect
+from sqlalchemy.sql import text
+
+from . import db
+# Миграции создают таблицы и индексы по db.metadata, поэтому модели должны быть
+# зарегистрированы в ней до первой миграции (create_app импортирует их позже)
+from . import models  # noqa: F401
+
+# Таблицы моделей, которые на самом деле являются представлениями
+VIEW_TABLES = {"public.event_results_view", "public.school_points_view"}
+
+# Ключ advisory-блокировки, чтобы две команды upgrade не выполнялись одновременно
+UPGRADE_LOCK_KEY = 7301
+
+schema_version = Table(
+    "schema_version", MetaData(schema="public"),
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+EVENT_RESULTS_VIEW = """
+CREATE VIEW public.event_results_view AS
+SELECT
+    r.result_id,
+    e.event_id,
+    e.name as event_name,
+    e.date,
+    e.location,
+    s.name as sport_name,
+    t.first_name || ' ' || t.last_name as teacher_name,
+    sch.name as school_name,
+    p.first_name || ' ' || p.last_name as participant_name,
+    c.name as category_name,
+    r.time,
+    r.points,
+    r.place
+FROM events e
+JOIN sports s ON e.sport_id = s.sport_id
+JOIN teachers t ON e.responsible_id = t.teacher_id
+JOIN results r ON e.event_id = r.event_id
+JOIN participants p ON r.participant_id = p.participant_id
+JOIN schools sch ON p.school_id = sch.school_id
+JOIN categories c ON r.category_id = c.category_id
+"""
+
+SCHOOL_POINTS_VIEW = """
+CREATE VIEW public.school_points_view AS
+SELECT
+    s.school_id,
+    s.name as school_name,
+    COUNT(DISTINCT e.event_id) as events_participated,
+    COUNT(r.result_id) as total_results,
+    COALESCE(SUM(r.points), 0) as total_points,
+    CASE
+        WHEN COUNT(r.result_id) > 0 THEN ROUND(AVG(CAST(r.points AS NUMERIC)), 2)
+        ELSE 0
+    END as avg_points
+FROM schools s
+LEFT JOIN participants p ON s.school_id = p.school_id
+LEFT JOIN results r ON p.participant_id = r.participant_id
+LEFT JOIN events e ON r.event_id = e.event_id
+GROUP BY s.school_id, s.name
+"""
+
+
+def _create_tables():
+    tables = [table for name, table in db.metadata.tables.items() if name not in VIEW_TABLES]
+    db.metadata.create_all(db.session.connection(), tables=tables)
+
+    # Тестовые данные для пустой базы
+    from .models import School
+    if not School.query.first():
+        db.session.add(School(name="School №1", address="123 Main St", contact_phone="+123456789"))
+        db.session.add(School(name="School №2", address="456 Oak St", contact_phone="+987654321"))
+
+
+def _add_school_points_results_count():
+    # Таблица могла быть создана предыдущим шагом уже с этой колонкой
+    columns = {column["name"] for column in inspect(db.session.connection()).get_columns(
+        "school_points", schema="public")}
+    if "results_count" not in columns:
+        db.session.execute(text(
+            "ALTER TABLE public.school_points ADD COLUMN results_count INTEGER NOT NULL DEFAULT 0"
+        ))
+
+
+def _drop_views():
+    connection = db.session.connection()
+    materialized = set()
+    if connection.dialect.name == "postgresql":
+        materialized = set(inspect(connection).get_materialized_view_names(schema="public"))
+    for name in ("school_points_view", "event_results_view"):
+        kind = "MATERIALIZED VIEW" if name in materialized else "VIEW"
+        db.session.execute(text(f"DROP {kind} IF EXISTS public.{name}"))
+
+
+def create_views(materialized=False):
+    """Пересоздает представления отчетов: обычные или материализованные с индексами."""
+    _drop_views()
+    for sql in (SCHOOL_POINTS_VIEW, EVENT_RESULTS_VIEW):
+        if materialized:
+            sql = sql.replace("CREATE VIEW", "CREATE MATERIALIZED VIEW", 1)
+        db.session.execute(text(sql))
+    if materialized:
+        from .reporting import VIEW_INDEXES, record_refresh
+        for sql in VIEW_INDEXES:
+            db.session.execute(text(sql))
+        # CREATE MATERIALIZED VIEW уже заполняет представление данными
+        record_refresh(db.session.connection())
+
+
+def _create_search_indexes():
+    from .search import create_trgm_indexes
+    create_trgm_indexes()
+
+
+def _reporting_views():
+    from .reporting import materialized_views_enabled, view_refreshes
+    view_refreshes.create(db.session.connection(), checkfirst=True)
+    if materialized_views_enabled():
+        create_views(materialized=True)
+
+
+def _create_indexes():
+    # Индексы объявлены в моделях; в новой базе их уже создал create_all
+    for name, table in db.metadata.tables.items():
+        if name in VIEW_TABLES:
+            continue
+        for index in table.indexes:
+            index.create(db.session.connection(), checkfirst=True)
+
+
+def _normalize_category_genders():
+    # Категории хранили пол кириллицей ('М', 'Ж'), участники - латиницей ('M', 'F')
+    for cyrillic, latin in (("М", "M"), ("Ж", "F")):
+        db.session.execute(
+            text("UPDATE public.categories SET gender = :latin WHERE gender = :cyrillic"),
+            {"latin": latin, "cyrillic": cyrillic}
+        )
+
+
+def _create_table_versions(bind=None):
+    from .http_cache import table_versions
+    table_versions.create(bind or db.session.connection(), checkfirst=True)
+
+
+# (версия, описание, функция); новые миграции добавляются только в конец
+MIGRATIONS = [
+    (1, "create tables", _create_tables),
+    (2, "school_points.results_count", _add_school_points_results_count),
+    (3, "reporting views", create_views),
+    (4, "pg_trgm search indexes", _create_search_indexes),
+    (5, "foreign key and sort indexes", _create_indexes),
+    (6, "materialized reporting views", _reporting_views),
+    (7, "latin category genders", _normalize_category_genders),
+    (8, "shared table versions for HTTP cache", _create_table_versions),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version():
+    """Текущая версия схемы; None, если таблицы schema_version еще нет."""
+    try:
+        with db.engine.connect() as connection:
+            return connection.execute(
+                text("SELECT MAX(version) FROM public.schema_version")
+            ).scalar() or 0
+    except Exception:
+        return None
+
+
+def upgrade(target=LATEST_VERSION, echo=print):
+    """Применяет недостающие миграции до версии target, каждую в своей транзакции."""
+    schema_version.create(db.engine, checkfirst=True)
+    # Версии таблиц увеличиваются при каждом commit, в том числе в миграциях
+    _create_table_versions(db.engine)
+
+    # Блокировка держится на отдельном соединении до конца обновления
+    lock = db.engine.connect()
+    if lock.dialect.name == "postgresql":
+        lock.execute(text("SELECT pg_advisory_lock(:key)"), {"key": UPGRADE_LOCK_KEY})
+    try:
+        applied = set(db.session.scalars(text("SELECT version FROM public.schema_version")))
+        db.session.commit()
+        for version, description, migrate in MIGRATIONS:
+            if version in applied or version > target:
+                continue
+            echo(f"Applying migration {version}: {description}")
+            try:
+                migrate()
+                db.session.execute(schema_version.insert().values(
+                    version=version, description=description, applied_at=datetime.now()
+                ))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+    finally:
+        if lock.dialect.name == "postgresql":
+            lock.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": UPGRADE_LOCK_KEY})
+        lock.close()
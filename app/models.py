@@ -1,10 +1,38 @@
 # app/models.py
 from . import db
 from sqlalchemy.dialects.postgresql import INTERVAL
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Index, UniqueConstraint
+from sqlalchemy.orm import joinedload
 
 
-class School(db.Model):
+def format_time(value):
+    """Время результата (timedelta) в виде ЧЧ:ММ:СС; пустая строка, если времени нет."""
+    if not value:
+        return ""
+    seconds = value.total_seconds()
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    seconds = int(seconds % 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+class ListLoadingMixin:
+    """Стратегия загрузки связей для страниц-списков.
+
+    Модель перечисляет в list_options() связи, которые шаблон списка читает у каждой строки,
+    чтобы они подгружались одним запросом, а не отдельным запросом на строку.
+    """
+
+    @classmethod
+    def list_options(cls):
+        return ()
+
+    @classmethod
+    def list_query(cls):
+        return cls.query.options(*cls.list_options())
+
+
+class School(ListLoadingMixin, db.Model):
     __tablename__ = "schools"
     __table_args__ = {'schema': 'public'}
 
@@ -17,10 +45,12 @@ class School(db.Model):
         return f"<School {self.name}>"
 
 
-class Class(db.Model):
+class Class(ListLoadingMixin, db.Model):
     __tablename__ = "classes"
     __table_args__ = (
         UniqueConstraint("school_id", "name", name="uix_school_name"),
+        Index("ix_classes_teacher_id", "teacher_id"),
+        Index("ix_classes_name", "name", "class_id"),
         {'schema': 'public'}
     )
 
@@ -34,13 +64,26 @@ class Class(db.Model):
     school = db.relationship('School', backref=db.backref('classes', lazy=True))
     teacher = db.relationship('Teacher', backref=db.backref('classes', lazy=True))
 
+    @classmethod
+    def list_options(cls):
+        return (
+            joinedload(cls.school),
+            joinedload(cls.teacher),
+        )
+
     def __repr__(self):
         return f"<Class {self.name}>"
 
 
-class Participant(db.Model):
+class Participant(ListLoadingMixin, db.Model):
     __tablename__ = "participants"
-    __table_args__ = {'schema': 'public'}
+    __table_args__ = (
+        # participant_id в индексе - для соединения schools -> participants в school_points_view
+        Index("ix_participants_school_id", "school_id", "participant_id"),
+        Index("ix_participants_class_id", "class_id"),
+        Index("ix_participants_name", "last_name", "first_name", "participant_id"),
+        {'schema': 'public'}
+    )
 
     participant_id = db.Column(db.Integer, primary_key=True)
     school_id = db.Column(db.Integer, db.ForeignKey("public.schools.school_id", ondelete="RESTRICT"), nullable=False)
@@ -61,11 +104,17 @@ class Participant(db.Model):
     school = db.relationship('School', backref=db.backref('participants', lazy=True))
     class_ = db.relationship('Class', backref=db.backref('participants', lazy=True))
 
+    @classmethod
+    def list_options(cls):
+        return (
+            joinedload(cls.class_).joinedload(Class.school),
+        )
+
     def __repr__(self):
         return f"<Participant {self.first_name} {self.last_name}>"
 
 
-class Sport(db.Model):
+class Sport(ListLoadingMixin, db.Model):
     __tablename__ = "sports"
     __table_args__ = {'schema': 'public'}
 
@@ -95,7 +144,10 @@ class Rank(db.Model):
 
 class ParticipantRank(db.Model):
     __tablename__ = "participant_ranks"
-    __table_args__ = {'schema': 'public'}
+    __table_args__ = (
+        Index("ix_participant_ranks_rank_id", "rank_id"),
+        {'schema': 'public'}
+    )
 
     participant_id = db.Column(db.Integer, db.ForeignKey("public.participants.participant_id", ondelete="CASCADE"),
                                primary_key=True)
@@ -106,9 +158,14 @@ class ParticipantRank(db.Model):
         return f"<ParticipantRank participant_id={self.participant_id}>"
 
 
-class Event(db.Model):
+class Event(ListLoadingMixin, db.Model):
     __tablename__ = "events"
-    __table_args__ = {'schema': 'public'}
+    __table_args__ = (
+        Index("ix_events_sport_id", "sport_id"),
+        Index("ix_events_responsible_id", "responsible_id"),
+        Index("ix_events_date", "date", "event_id"),
+        {'schema': 'public'}
+    )
 
     event_id = db.Column(db.Integer, primary_key=True)
     sport_id = db.Column(db.Integer, db.ForeignKey("public.sports.sport_id", ondelete="RESTRICT"), nullable=False)
@@ -139,13 +196,24 @@ class Event(db.Model):
         cascade='all, delete-orphan'
     )
 
+    @classmethod
+    def list_options(cls):
+        return (
+            joinedload(cls.sport),
+            joinedload(cls.responsible),
+        )
+
     def __repr__(self):
         return f"<Event {self.name}>"
 
 
-class Teacher(db.Model):
+class Teacher(ListLoadingMixin, db.Model):
     __tablename__ = "teachers"
-    __table_args__ = {'schema': 'public'}
+    __table_args__ = (
+        Index("ix_teachers_school_id", "school_id"),
+        Index("ix_teachers_name", "last_name", "first_name", "teacher_id"),
+        {'schema': 'public'}
+    )
 
     teacher_id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(50), nullable=False)
@@ -156,13 +224,23 @@ class Teacher(db.Model):
     # Добавляем связь со школой
     school = db.relationship('School', backref=db.backref('teachers', lazy=True))
 
+    @classmethod
+    def list_options(cls):
+        return (
+            joinedload(cls.school),
+        )
+
     def __repr__(self):
         return f"<Teacher {self.first_name} {self.last_name}>"
 
 
 class EventParticipant(db.Model):
     __tablename__ = "event_participants"
-    __table_args__ = {'schema': 'public'}
+    __table_args__ = (
+        # (event_id, participant_id) покрыт первичным ключом
+        Index("ix_event_participants_participant_id", "participant_id"),
+        {'schema': 'public'}
+    )
 
     event_id = db.Column(db.Integer, db.ForeignKey("public.events.event_id", ondelete="CASCADE"), primary_key=True)
     participant_id = db.Column(db.Integer, db.ForeignKey("public.participants.participant_id", ondelete="CASCADE"),
@@ -175,7 +253,15 @@ class EventParticipant(db.Model):
 
 class Result(db.Model):
     __tablename__ = "results"
-    __table_args__ = {'schema': 'public'}
+    __table_args__ = (
+        # Результаты мероприятия и пересчет мест по категориям (RANK() ... ORDER BY time)
+        Index("ix_results_event_category_time", "event_id", "category_id", "time"),
+        # Соединение participants -> results в school_points_view без чтения таблицы
+        Index("ix_results_participant_id", "participant_id",
+              postgresql_include=["event_id", "result_id", "points"]),
+        Index("ix_results_category_id", "category_id"),
+        {'schema': 'public'}
+    )
 
     result_id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey("public.events.event_id", ondelete="RESTRICT"), nullable=False)
@@ -195,13 +281,7 @@ class Result(db.Model):
     @property
     def formatted_time(self):
         # Преобразуем INTERVAL в читаемый формат
-        if self.time:
-            seconds = self.time.total_seconds()
-            hours = int(seconds // 3600)
-            minutes = int((seconds % 3600) // 60)
-            seconds = int(seconds % 60)
-            return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-        return ""
+        return format_time(self.time)
 
     def __repr__(self):
         return f"<Result result_id={self.result_id}>"
@@ -209,17 +289,23 @@ class Result(db.Model):
 
 class SchoolPoint(db.Model):
     __tablename__ = "school_points"
-    __table_args__ = {'schema': 'public'}
+    __table_args__ = (
+        # (school_id, event_id) покрыт первичным ключом; индекс - для пересчета по мероприятию
+        Index("ix_school_points_event_id", "event_id"),
+        {'schema': 'public'}
+    )
 
     school_id = db.Column(db.Integer, db.ForeignKey("public.schools.school_id", ondelete="CASCADE"), primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey("public.events.event_id", ondelete="CASCADE"), primary_key=True)
-    total_points = db.Column(db.Integer, nullable=False)
+    total_points = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Количество результатов школы на мероприятии (нужно для среднего балла)
+    results_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     def __repr__(self):
         return f"<SchoolPoint school_id={self.school_id}>"
 
 
-class Category(db.Model):
+class Category(ListLoadingMixin, db.Model):
     __tablename__ = "categories"
     __table_args__ = {'schema': 'public'}
 
@@ -235,7 +321,10 @@ class Category(db.Model):
 
 class Log(db.Model):
     __tablename__ = "logs"
-    __table_args__ = {'schema': 'public'}
+    __table_args__ = (
+        Index("ix_logs_user_id", "user_id"),
+        {'schema': 'public'}
+    )
 
     log_id = db.Column(db.Integer, primary_key=True)
     action = db.Column(db.String(200), nullable=False)
@@ -250,7 +339,9 @@ class EventResultsView(db.Model):
     __tablename__ = 'event_results_view'
     __table_args__ = {'schema': 'public'}
 
-    event_id = db.Column(db.Integer, primary_key=True)
+    # Представление содержит строку на каждый результат, поэтому ключ - result_id
+    result_id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer)
     event_name = db.Column(db.String(100))
     date = db.Column(db.Date)
     location = db.Column(db.String(200))
@@ -0,0 +1,210 @@
+# app/pagination.py
+# Keyset-пагинация (seek method) для страниц-списков.
+# Страница определяется не номером/OFFSET, а значениями ключа сортировки последней
+# показанной строки, поэтому стоимость запроса не растет с номером страницы.
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from flask import abort, request, url_for
+from sqlalchemy import tuple_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+# Для страниц, которые читаются курсором и рендерятся потоком
+MAX_STREAM_LIMIT = 50000
+STREAM_BATCH_SIZE = 1000
+
+
+def encode_cursor(values):
+    values = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _coerce(value, column):
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def decode_cursor(cursor, columns):
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    values = json.loads(raw)
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("cursor does not match sort key")
+    return [_coerce(value, column) for value, column in zip(values, columns)]
+
+
+class KeysetPage:
+    def __init__(self, items, columns, sort, descending, limit, has_next, has_prev):
+        self.items = items
+        self.columns = columns
+        self.sort = sort
+        self.descending = descending
+        self.limit = limit
+        self.has_next = has_next
+        self.has_prev = has_prev
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def _key(self, item):
+        return [getattr(item, column.key) for column in self.columns]
+
+    def _url(self, **params):
+        # Остальные параметры запроса (фильтры, fields) переходят на соседние страницы
+        args = {name: value for name, value in request.args.items() if name not in ("after", "before", "order")}
+        args.update(request.view_args or {})
+        args.update(sort=self.sort, limit=self.limit)
+        if self.descending:
+            args["order"] = "desc"
+        args.update(params)
+        return url_for(request.endpoint, **args)
+
+    @property
+    def next_url(self):
+        if self.has_next and self.items:
+            return self._url(after=encode_cursor(self._key(self.items[-1])))
+        return None
+
+    @property
+    def prev_url(self):
+        if self.has_prev and self.items:
+            return self._url(before=encode_cursor(self._key(self.items[0])))
+        return None
+
+    def sort_url(self, sort):
+        # Смена сортировки начинает список сначала
+        descending = sort == self.sort and not self.descending
+        args = dict(request.view_args or {})
+        args.update(sort=sort, limit=self.limit)
+        if descending:
+            args["order"] = "desc"
+        return url_for(request.endpoint, **args)
+
+
+class KeysetStream(KeysetPage):
+    """Страница, строки которой читаются из курсора по мере рендеринга шаблона.
+
+    has_next и ссылки навигации становятся известны после того, как строки прочитаны,
+    поэтому в шаблоне их нужно выводить после таблицы.
+    """
+
+    def __init__(self, rows, columns, sort, descending, limit, has_prev):
+        super().__init__([], columns, sort, descending, limit, has_next=False, has_prev=has_prev)
+        self._rows = rows
+        self._first = None
+        self._last = None
+
+    def __iter__(self):
+        try:
+            for count, row in enumerate(self._rows):
+                if count == self.limit:
+                    self.has_next = True
+                    break
+                if self._first is None:
+                    self._first = row
+                self._last = row
+                yield row
+        finally:
+            self._rows.close()
+
+    def __bool__(self):
+        return True
+
+    def __len__(self):
+        raise TypeError("KeysetStream has no length until it is consumed")
+
+    @property
+    def next_url(self):
+        if self.has_next and self._last is not None:
+            return self._url(after=encode_cursor(self._key(self._last)))
+        return None
+
+    @property
+    def prev_url(self):
+        if self.has_prev and self._first is not None:
+            return self._url(before=encode_cursor(self._key(self._first)))
+        return None
+
+
+def _seek_args(sorts, default_sort, max_limit):
+    sort = request.args.get("sort", default_sort)
+    if sort not in sorts:
+        abort(400)
+    columns = sorts[sort]
+    descending = request.args.get("order") == "desc"
+    limit = request.args.get("limit", DEFAULT_LIMIT, type=int)
+    limit = max(1, min(limit, max_limit))
+
+    after = request.args.get("after")
+    before = request.args.get("before")
+    try:
+        after = decode_cursor(after, columns) if after else None
+        before = decode_cursor(before, columns) if before else None
+    except (ValueError, TypeError, binascii.Error):
+        abort(400)
+    return sort, columns, descending, limit, after, before
+
+
+def _seek(query, columns, descending, limit, after, before):
+    key = tuple_(*columns)
+    # При движении назад читаем в обратном порядке и разворачиваем страницу
+    reverse = descending != (before is not None)
+    if after is not None:
+        query = query.filter(key < tuple_(*after) if descending else key > tuple_(*after))
+    if before is not None:
+        query = query.filter(key > tuple_(*before) if descending else key < tuple_(*before))
+    query = query.order_by(*[c.desc() if reverse else c.asc() for c in columns])
+    return query.limit(limit + 1)
+
+
+def _backwards_page(items, columns, sort, descending, limit):
+    has_more = len(items) > limit
+    items = items[:limit]
+    items.reverse()
+    return KeysetPage(items, columns, sort, descending, limit, has_next=True, has_prev=has_more)
+
+
+def paginate(query, sorts, default_sort):
+    """Возвращает страницу query по параметрам запроса sort, order, after, before и limit.
+
+    sorts - словарь {имя сортировки: (колонка, ...)}; последняя колонка ключа
+    должна делать его уникальным (обычно это первичный ключ).
+    """
+    sort, columns, descending, limit, after, before = _seek_args(sorts, default_sort, MAX_LIMIT)
+    items = _seek(query, columns, descending, limit, after, before).all()
+
+    if before is not None:
+        return _backwards_page(items, columns, sort, descending, limit)
+    has_more = len(items) > limit
+    return KeysetPage(items[:limit], columns, sort, descending, limit,
+                      has_next=has_more, has_prev=after is not None)
+
+
+def paginate_stream(session, select, sorts, default_sort, max_limit=MAX_STREAM_LIMIT, batch_size=STREAM_BATCH_SIZE):
+    """Как paginate(), но для Core-запроса select: строки читаются серверным курсором
+    пачками по batch_size и отдаются шаблону без построения ORM-объектов.
+    """
+    sort, columns, descending, limit, after, before = _seek_args(sorts, default_sort, max_limit)
+    select = _seek(select, columns, descending, limit, after, before)
+
+    if before is not None:
+        # Страница назад ограничена limit, ее можно прочитать целиком
+        items = session.execute(select).all()
+        return _backwards_page(items, columns, sort, descending, limit)
+    rows = session.execute(select.execution_options(yield_per=batch_size))
+    return KeysetStream(rows, columns, sort, descending, limit, has_prev=after is not None)
@@ -0,0 +1,149 @@
+# app/profiling.py
+# Профилирование HTTP-запросов: количество SQL-запросов, время в базе, время
+# рендеринга шаблонов и самые медленные запросы. Включается через PROFILING=1.
+# Итоги отдаются в заголовке Server-Timing и копятся в кольцевом буфере
+# (/debug/profile); запросы дольше SLOW_QUERY_MS пишутся в таблицу logs.
+# Для потоковых ответов (stream_template) учитывается только время до отдачи
+# первого байта.
+import heapq
+import re
+import threading
+import time
+from collections import deque
+
+from flask import g, has_request_context, jsonify, request
+from flask.signals import before_render_template, template_rendered
+from sqlalchemy import event
+
+from .log_writer import get_log_writer
+from .replicas import all_engines
+
+# Сколько самых медленных запросов хранить в профиле одного HTTP-запроса
+SLOWEST_STATEMENTS = 5
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|%\([^)]*\)s|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\bIN \((?:\?(?:, )?)+\)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_sql(statement):
+    """Заменяет литералы и параметры на ?, чтобы одинаковые запросы совпадали."""
+    sql = _SPACES.sub(" ", statement).strip()
+    sql = _LITERALS.sub("?", sql)
+    return _IN_LISTS.sub("IN (...)", sql)
+
+
+class RequestProfile:
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.status = None
+        self.statements = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self._slowest = []
+
+    def add_statement(self, statement, seconds):
+        self.statements += 1
+        self.db_time += seconds
+        item = (seconds, self.statements, statement)
+        if len(self._slowest) < SLOWEST_STATEMENTS:
+            heapq.heappush(self._slowest, item)
+        else:
+            heapq.heappushpop(self._slowest, item)
+
+    @property
+    def slowest(self):
+        return [(seconds, normalize_sql(statement))
+                for seconds, _, statement in sorted(self._slowest, reverse=True)]
+
+    def server_timing(self):
+        return ", ".join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.statements} queries"',
+            f"tpl;dur={self.template_time * 1000:.1f}",
+            f"total;dur={self.total * 1000:.1f}",
+        ])
+
+    def to_dict(self):
+        return {
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "total_ms": round(self.total * 1000, 1),
+            "db_ms": round(self.db_time * 1000, 1),
+            "template_ms": round(self.template_time * 1000, 1),
+            "statements": self.statements,
+            "slowest": [{"ms": round(seconds * 1000, 1), "sql": sql} for seconds, sql in self.slowest],
+        }
+
+
+def _current_profile():
+    if has_request_context():
+        return g.get("profile")
+    return None
+
+
+def init_profiling(app):
+    if not app.config.get("PROFILING"):
+        return
+
+    profiles = deque(maxlen=app.config["PROFILE_BUFFER_SIZE"])
+    profiles_lock = threading.Lock()
+    slow_seconds = app.config["SLOW_QUERY_MS"] / 1000
+    slow_log = get_log_writer(app) if slow_seconds > 0 else None
+
+    def start_statement(conn, cursor, statement, parameters, context, executemany):
+        if _current_profile() is not None:
+            conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    def finish_statement(conn, cursor, statement, parameters, context, executemany):
+        profile = _current_profile()
+        started = conn.info.get("profile_started")
+        if profile is None or not started:
+            return
+        seconds = time.perf_counter() - started.pop()
+        profile.add_statement(statement, seconds)
+        if slow_log is not None and seconds >= slow_seconds:
+            slow_log.submit(f"slow query {seconds * 1000:.0f} ms {request.path}: {normalize_sql(statement)}")
+
+    for engine in all_engines(app):
+        event.listen(engine, "before_cursor_execute", start_statement)
+        event.listen(engine, "after_cursor_execute", finish_statement)
+
+    def start_template(sender, template, context, **extra):
+        profile = _current_profile()
+        if profile is not None:
+            g.template_started = time.perf_counter()
+
+    def finish_template(sender, template, context, **extra):
+        profile = _current_profile()
+        started = g.pop("template_started", None)
+        if profile is not None and started is not None:
+            profile.template_time += time.perf_counter() - started
+
+    before_render_template.connect(start_template, app, weak=False)
+    template_rendered.connect(finish_template, app, weak=False)
+
+    @app.before_request
+    def start_profile():
+        g.profile = RequestProfile(request.method, request.path)
+
+    @app.after_request
+    def finish_profile(response):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return response
+        profile.total = time.perf_counter() - profile.started
+        profile.status = response.status_code
+        response.headers["Server-Timing"] = profile.server_timing()
+        with profiles_lock:
+            profiles.append(profile)
+        return response
+
+    @app.route("/debug/profile")
+    def debug_profile():
+        with profiles_lock:
+            recent = list(profiles)
+        return jsonify([profile.to_dict() for profile in reversed(recent)])
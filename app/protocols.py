@@ -0,0 +1,118 @@
+# app/protocols.py
+# Пакетный ввод результатов мероприятия (финишный протокол).
+# Все строки проверяются несколькими запросами на весь протокол и вставляются
+# одним executemany в одной транзакции; места и очки затем рассчитывает app/ranking.py.
+from datetime import timedelta
+
+from sqlalchemy import insert, select
+
+from . import db
+from .eligibility import event_eligibility
+from .models import Category, EventParticipant, Result
+from .ranking import rank_results
+from .tabular import read_rows
+
+PROTOCOL_COLUMNS = ("participant_id", "category_id", "time")
+# category_id можно не заполнять - подставляется подходящая категория участника
+REQUIRED_COLUMNS = ("participant_id", "time")
+
+
+def parse_time(value):
+    """Разбирает время в формате ЧЧ:ММ:СС."""
+    h, m, s = map(int, value.strip().split(':'))
+    if not (0 <= h <= 23 and 0 <= m <= 59 and 0 <= s <= 59):
+        raise ValueError(value)
+    return timedelta(hours=h, minutes=m, seconds=s)
+
+
+def read_protocol(stream, filename):
+    """Читает протокол из CSV или XLSX. Возвращает список (номер строки, словарь значений).
+
+    Первая строка - заголовок с колонками PROTOCOL_COLUMNS (category_id необязательна).
+    """
+    return list(read_rows(stream, filename))
+
+
+def parse_protocol(raw_rows):
+    """Приводит значения строк протокола к нужным типам.
+
+    Возвращает (rows, errors): rows - список (строка, словарь), errors - список (строка, сообщение).
+    """
+    rows, errors = [], []
+    for line, raw in raw_rows:
+        missing = [name for name in REQUIRED_COLUMNS if not (raw.get(name) or "").strip()]
+        if missing:
+            errors.append((line, f"Не заполнены поля: {', '.join(missing)}"))
+            continue
+        try:
+            category_id = (raw.get("category_id") or "").strip()
+            row = {
+                "participant_id": int(raw["participant_id"]),
+                "category_id": int(category_id) if category_id else None,
+            }
+        except ValueError:
+            errors.append((line, "participant_id и category_id должны быть целыми числами"))
+            continue
+        try:
+            row["time"] = parse_time(raw["time"])
+        except ValueError:
+            errors.append((line, f"Время должно быть в формате ЧЧ:ММ:СС: {raw['time']}"))
+            continue
+        rows.append((line, row))
+    return rows, errors
+
+
+def save_protocol(event_id, rows, errors=()):
+    """Проверяет и вставляет результаты мероприятия.
+
+    errors - ошибки разбора из parse_protocol(). Если хотя бы одна строка содержит ошибку,
+    ничего не вставляется и возвращается список всех ошибок (строка, сообщение),
+    отсортированный по номеру строки. Commit делает вызывающий код.
+    """
+    participant_ids = {row["participant_id"] for _, row in rows}
+
+    # Пустая категория заменяется подходящей участнику по возрасту и полу
+    if any(row["category_id"] is None for _, row in rows):
+        eligibility = event_eligibility(event_id)
+        for _, row in rows:
+            if row["category_id"] is None and eligibility is not None:
+                row["category_id"] = eligibility.default(row["participant_id"])
+    category_ids = {row["category_id"] for _, row in rows} - {None}
+
+    # Регистрации, категории и уже внесенные результаты - по одному запросу на протокол
+    registered = set(db.session.scalars(
+        select(EventParticipant.participant_id)
+        .where(EventParticipant.event_id == event_id,
+               EventParticipant.participant_id.in_(participant_ids))
+    ))
+    categories = set(db.session.scalars(
+        select(Category.category_id).where(Category.category_id.in_(category_ids))
+    ))
+    existing = set(db.session.scalars(
+        select(Result.participant_id).where(Result.event_id == event_id,
+                                            Result.participant_id.in_(participant_ids))
+    ))
+
+    errors, seen = list(errors), set()
+    for line, row in rows:
+        participant_id = row["participant_id"]
+        if participant_id not in registered:
+            errors.append((line, f"Участник {participant_id} не зарегистрирован на это мероприятие"))
+        elif participant_id in existing:
+            errors.append((line, f"Результат участника {participant_id} уже добавлен"))
+        elif participant_id in seen:
+            errors.append((line, f"Участник {participant_id} встречается в протоколе повторно"))
+        if row["category_id"] is None:
+            errors.append((line, f"Нет подходящей категории для участника {participant_id}"))
+        elif row["category_id"] not in categories:
+            errors.append((line, f"Категория {row['category_id']} не найдена"))
+        seen.add(participant_id)
+
+    if errors or not rows:
+        return sorted(errors, key=lambda error: error[0])
+
+    # Места и очки заполняются пересчетом затронутых категорий
+    values = [dict(row, event_id=event_id, points=0, place=0) for _, row in rows]
+    db.session.execute(insert(Result), values)
+    rank_results(event_id, category_ids)
+    return []
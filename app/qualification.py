@@ -0,0 +1,104 @@
+# app/qualification.py
+# Присвоение спортивных разрядов (Rank) по сумме очков участника в виде спорта.
+# Суммы очков по (участник, вид спорта) считаются одним сгруппированным запросом
+# и соединяются с таблицей ranks; оконная функция выбирает высший разряд, для
+# которого набрано min_points. Новые разряды вставляются одним INSERT ... SELECT,
+# после чего у участника удаляются более низкие разряды того же вида спорта.
+# Разряды не понижаются: если очки уменьшились, присвоенный разряд сохраняется.
+from datetime import date
+
+from sqlalchemy import Date, and_, delete, exists, func, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import aliased
+
+from . import db
+from .models import Event, ParticipantRank, Rank, Result
+
+
+def _scope(query, event_id, sport_id):
+    """Ограничивает запрос по участникам мероприятия event_id и/или виду спорта."""
+    if event_id is not None:
+        # Подзапросы не коррелируют с внешними results и events
+        query = query.where(
+            Result.participant_id.in_(
+                select(Result.participant_id).where(Result.event_id == event_id).correlate(None)
+            ),
+            Event.sport_id == select(Event.sport_id).where(Event.event_id == event_id)
+            .correlate(None).scalar_subquery(),
+        )
+    if sport_id is not None:
+        query = query.where(Event.sport_id == sport_id)
+    return query
+
+
+def qualified_ranks(event_id=None, sport_id=None):
+    """Подзапрос (participant_id, sport_id, rank_id, min_points) с высшим заработанным разрядом."""
+    totals = _scope(
+        select(Result.participant_id, Event.sport_id, func.sum(Result.points).label("points"))
+        .join(Event, Event.event_id == Result.event_id)
+        .group_by(Result.participant_id, Event.sport_id),
+        event_id, sport_id
+    ).subquery()
+    ranked = (
+        select(
+            totals.c.participant_id,
+            totals.c.sport_id,
+            Rank.rank_id,
+            Rank.min_points,
+            func.row_number().over(
+                partition_by=(totals.c.participant_id, totals.c.sport_id),
+                order_by=Rank.min_points.desc()
+            ).label("position"),
+        )
+        .join(Rank, and_(Rank.sport_id == totals.c.sport_id, Rank.min_points <= totals.c.points))
+    ).subquery()
+    return select(ranked.c.participant_id, ranked.c.sport_id, ranked.c.rank_id, ranked.c.min_points) \
+        .where(ranked.c.position == 1).subquery()
+
+
+def _held_at_least(participant_id, sport_id, min_points):
+    """Условие: у участника уже есть разряд вида спорта не ниже min_points."""
+    held_rank = aliased(Rank)
+    return exists().where(
+        ParticipantRank.participant_id == participant_id,
+        held_rank.rank_id == ParticipantRank.rank_id,
+        held_rank.sport_id == sport_id,
+        held_rank.min_points >= min_points,
+    )
+
+
+def qualify(event_id=None, sport_id=None, assigned_date=None):
+    """Присваивает и повышает разряды; возвращает число присвоенных разрядов.
+
+    event_id - инкрементальный режим: только участники с результатами мероприятия
+    и только его вид спорта. Без параметров пересчитываются все участники.
+    Commit делает вызывающий код.
+    """
+    best = qualified_ranks(event_id, sport_id)
+    source = select(best.c.participant_id, best.c.rank_id, literal(assigned_date or date.today(), Date)) \
+        .where(~_held_at_least(best.c.participant_id, best.c.sport_id, best.c.min_points))
+    insert = sqlite_insert if db.engine.dialect.name == "sqlite" else pg_insert
+    assigned = db.session.execute(
+        insert(ParticipantRank.__table__)
+        .from_select(["participant_id", "rank_id", "assigned_date"], source)
+        .on_conflict_do_nothing(index_elements=["participant_id", "rank_id"])
+    ).rowcount
+
+    if assigned:
+        # Более низкие разряды того же вида спорта заменены новым
+        rank = aliased(Rank)
+        higher = aliased(ParticipantRank)
+        higher_rank = aliased(Rank)
+        superseded = exists().where(
+            rank.rank_id == ParticipantRank.rank_id,
+            higher.participant_id == ParticipantRank.participant_id,
+            higher_rank.rank_id == higher.rank_id,
+            higher_rank.sport_id == rank.sport_id,
+            higher_rank.min_points > rank.min_points,
+        )
+        stmt = delete(ParticipantRank).where(superseded)
+        if event_id is not None or sport_id is not None:
+            stmt = stmt.where(ParticipantRank.participant_id.in_(select(best.c.participant_id)))
+        db.session.execute(stmt.execution_options(synchronize_session=False))
+    return assigned
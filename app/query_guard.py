@@ -0,0 +1,59 @@
+# app/query_guard.py
+# Ограничение количества SQL-запросов на один HTTP-запрос.
+# В режиме тестирования (TESTING) превышение лимита приводит к ошибке,
+# в остальных режимах - только к предупреждению в лог.
+# Запросы считаются до закрытия ответа: тело потокового ответа (stream_template,
+# выгрузки) читает базу уже после after_request.
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from .replicas import all_engines
+
+
+class QueryLimitExceeded(AssertionError):
+    pass
+
+
+class StatementCount:
+    def __init__(self):
+        self.value = 0
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        count = g.get("sql_statements")
+        if count is not None:
+            count.value += 1
+
+
+def init_query_guard(app):
+    limit = app.config.get("SQL_STATEMENT_LIMIT")
+    if not limit:
+        return
+
+    for engine in all_engines(app):
+        event.listen(engine, "before_cursor_execute", _count_statement)
+
+    def check(name, count):
+        if count.value > limit:
+            message = f"{name}: {count.value} SQL statements (limit {limit})"
+            if app.testing:
+                raise QueryLimitExceeded(message)
+            print(f"Warning: {message}")
+
+    @app.before_request
+    def start_statement_count():
+        g.sql_statements = StatementCount()
+
+    @app.after_request
+    def check_statement_count(response):
+        count = g.get("sql_statements")
+        if count is None:
+            return response
+        name = f"{request.method} {request.path}"
+        if response.is_streamed:
+            # Счетчик общий с генератором тела (stream_with_context); проверка - после отправки
+            response.call_on_close(lambda: check(name, count))
+        else:
+            check(name, count)
+        return response
@@ -0,0 +1,56 @@
+# app/ranking.py
+# Расчет мест и очков по времени внутри пары (мероприятие, категория).
+# Места считает база одним проходом оконной функции RANK(), очки берутся
+# из таблицы RESULT_POINTS (очки за 1-е, 2-е, ... место; дальше - 0).
+# Следом пересчитываются очки школ и разряды участников мероприятия.
+from flask import current_app
+from sqlalchemy import case, func, select, update
+
+from . import db
+from .fragments import event_keys, invalidate
+from .live import notify_results
+from .models import Result
+from .qualification import qualify
+from .standings import rebuild
+
+
+def points_expression(place):
+    table = current_app.config["RESULT_POINTS"]
+    if not table:
+        return 0
+    return case(
+        {number: points for number, points in enumerate(table, start=1)},
+        value=place,
+        else_=0
+    )
+
+
+def rank_results(event_id, category_ids=None):
+    """Пересчитывает места и очки результатов мероприятия.
+
+    category_ids ограничивает пересчет затронутыми категориями; None - все категории.
+    Очки школ по мероприятию и разряды его участников пересчитываются следом, так как
+    очки других участников могли измениться. Commit делает вызывающий код, после него сбрасываются
+    кэшированные фрагменты мероприятия и уведомляются зрители (live.py).
+    """
+    results = Result.__table__
+    ranked = select(
+        results.c.result_id,
+        func.rank().over(
+            partition_by=(results.c.event_id, results.c.category_id),
+            order_by=results.c.time
+        ).label("place")
+    ).where(results.c.event_id == event_id)
+    if category_ids is not None:
+        ranked = ranked.where(results.c.category_id.in_(set(category_ids)))
+    ranked = ranked.subquery()
+
+    db.session.execute(
+        update(results)
+        .where(results.c.result_id == ranked.c.result_id)
+        .values(place=ranked.c.place, points=points_expression(ranked.c.place))
+    )
+    rebuild(event_id)
+    qualify(event_id)
+    invalidate(*event_keys(event_id))
+    notify_results(event_id, None if category_ids is None else set(category_ids))
@@ -0,0 +1,113 @@
+# app/registrations.py
+# Регистрация участников на мероприятие одним запросом.
+# Участники выбираются правилами: отдельные участники, целые классы и школы,
+# а также соответствие категориям (возраст на дату мероприятия и пол).
+# Регистрация выполняется одним INSERT ... SELECT ... ON CONFLICT DO NOTHING
+# в event_participants: ORM-объекты не создаются, повторная регистрация
+# уже записанных участников пропускается базой.
+from datetime import date
+
+from sqlalchemy import Date, and_, delete, exists, false, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from . import db
+from .eligibility import years_before
+from .fragments import invalidate_event
+from .importer import GENDERS
+from .models import Category, EventParticipant, Participant, Result
+
+
+def category_condition(category_ids, event_date):
+    """Условие на участников, подходящих хотя бы под одну из категорий.
+
+    Возраст на дату мероприятия переводится в границы даты рождения,
+    поэтому условие использует индекс и не зависит от диалекта.
+    """
+    conditions = []
+    categories = db.session.execute(
+        select(Category.min_age, Category.max_age, Category.gender)
+        .where(Category.category_id.in_(category_ids))
+    )
+    for min_age, max_age, gender in categories:
+        condition = and_(
+            Participant.birth_date <= years_before(event_date, min_age),
+            Participant.birth_date > years_before(event_date, max_age + 1),
+        )
+        gender = GENDERS.get((gender or "").upper())
+        if gender is not None:
+            condition = and_(condition, Participant.gender == gender)
+        conditions.append(condition)
+    return or_(*conditions) if conditions else false()
+
+
+def participants_query(event_date, participant_ids=(), class_ids=(), school_ids=(), category_ids=()):
+    """SELECT participant_id по правилам выбора.
+
+    Участники, классы и школы объединяются; категории ограничивают выборку,
+    а без остальных правил выбирают всех подходящих участников.
+    """
+    selected = []
+    if participant_ids:
+        selected.append(Participant.participant_id.in_(participant_ids))
+    if class_ids:
+        selected.append(Participant.class_id.in_(class_ids))
+    if school_ids:
+        selected.append(Participant.school_id.in_(school_ids))
+
+    conditions = [or_(*selected)] if selected else []
+    if category_ids:
+        conditions.append(category_condition(category_ids, event_date))
+    if not conditions:
+        raise ValueError("Не выбраны участники")
+    return select(Participant.participant_id).where(*conditions)
+
+
+def register(event, participant_ids=(), class_ids=(), school_ids=(), category_ids=(), registration_date=None):
+    """Регистрирует выбранных участников; возвращает число новых регистраций.
+
+    commit делает вызывающий код.
+    """
+    participants = participants_query(event.date, participant_ids, class_ids, school_ids, category_ids).subquery()
+    source = select(
+        literal(event.event_id),
+        participants.c.participant_id,
+        literal(registration_date or date.today(), Date),
+    )
+    insert = sqlite_insert if db.engine.dialect.name == "sqlite" else pg_insert
+    stmt = insert(EventParticipant.__table__).from_select(
+        ["event_id", "participant_id", "registration_date"],
+        # WHERE нужен SQLite, чтобы отличить ON CONFLICT от условия соединения
+        source.where(participants.c.participant_id.isnot(None))
+    ).on_conflict_do_nothing(index_elements=["event_id", "participant_id"])
+    added = db.session.execute(stmt).rowcount
+    if added:
+        invalidate_event(event.event_id)
+    return added
+
+
+def unregister(event_id, participant_ids):
+    """Снимает участников с мероприятия; участники с результатами остаются.
+
+    Возвращает число удаленных регистраций. commit делает вызывающий код.
+    """
+    has_result = exists().where(
+        Result.event_id == EventParticipant.event_id,
+        Result.participant_id == EventParticipant.participant_id,
+    )
+    removed = db.session.execute(
+        delete(EventParticipant)
+        .where(EventParticipant.event_id == event_id,
+               EventParticipant.participant_id.in_(participant_ids),
+               ~has_result)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if removed:
+        invalidate_event(event_id)
+    return removed
+
+
+def registration_count(event_id):
+    return db.session.scalar(
+        select(func.count()).select_from(EventParticipant).where(EventParticipant.event_id == event_id)
+    )
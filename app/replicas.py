@@ -0,0 +1,162 @@
+# app/replicas.py
+# Чтение с реплик базы данных.
+# Если в DATABASE_REPLICA_URLS заданы реплики, запросы GET (а в остальных
+# запросах - представления EventResultsView и SchoolPointsView) читают с одной
+# из них; запись идет в основную базу. Реплика выбирается при первом чтении.
+# После POST (или другого изменяющего запроса) клиент REPLICA_STICKY_SECONDS
+# секунд читает из основной базы, чтобы сразу увидеть свои изменения
+# (например, результат после add_result).
+# Реплика, не ответившая на проверку или вернувшая ошибку соединения, исключается
+# на REPLICA_RETRY_SECONDS секунд; если здоровых реплик нет, чтение идет в основную базу.
+# Ответы с ETag (app/http_cache.py) строятся по основной базе, если реплика еще
+# не получила последние изменения читаемых таблиц.
+import itertools
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from sqlalchemy.sql import text
+
+READ_METHODS = {"GET", "HEAD"}
+
+# Таблицы моделей-представлений: их можно читать с реплики в любом запросе
+VIEW_TABLES = {"event_results_view", "school_points_view"}
+
+
+class Replica:
+    def __init__(self, engine, check_interval, retry_seconds):
+        self.engine = engine
+        self.check_interval = check_interval
+        self.retry_seconds = retry_seconds
+        self.down_until = 0.0
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+        event.listen(engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        if context.is_disconnect or context.connection is None:
+            self.mark_down()
+
+    def mark_down(self):
+        with self._lock:
+            was_up = time.monotonic() >= self.down_until
+            self.down_until = time.monotonic() + self.retry_seconds
+        if was_up:
+            print(f"Replica {self.engine.url.render_as_string(hide_password=True)} is unavailable, "
+                  f"reading from the primary for {self.retry_seconds} s")
+
+    def healthy(self):
+        now = time.monotonic()
+        if now < self.down_until:
+            return False
+        if now - self.checked_at < self.check_interval:
+            return True
+        with self._lock:
+            self.checked_at = now
+        try:
+            with self.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        except Exception:
+            self.mark_down()
+            return False
+        return True
+
+
+class ReplicaSet:
+    def __init__(self, replicas):
+        self.replicas = replicas
+        self._order = itertools.cycle(range(len(replicas)))
+        self._lock = threading.Lock()
+
+    def choose(self):
+        """Следующая здоровая реплика по кругу или None."""
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                replica = self.replicas[next(self._order)]
+            if replica.healthy():
+                return replica.engine
+        return None
+
+
+class RoutingSession(Session):
+    """Сессия, которая отдает чтение реплике, выбранной для текущего HTTP-запроса."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not _is_write(clause):
+            replica = _read_replica(mapper)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _is_write(clause):
+    return clause is not None and getattr(clause, "is_dml", False)
+
+
+def _read_replica(mapper):
+    if not has_request_context():
+        return None
+    reads = g.get("replica_reads")
+    if reads is None:
+        return None
+    if reads == "views":
+        table = getattr(mapper, "local_table", None)
+        if table is None or table.name not in VIEW_TABLES:
+            return None
+    if "read_replica" not in g:
+        g.read_replica = current_app.extensions["replicas"].choose()
+    return g.read_replica
+
+
+def reads_from_replica():
+    """Текущий HTTP-запрос может читать таблицы с реплики."""
+    return has_request_context() and g.get("replica_reads") == "all"
+
+
+def use_primary():
+    """До конца HTTP-запроса чтение идет из основной базы."""
+    g.pop("replica_reads", None)
+    g.pop("read_replica", None)
+
+
+def all_engines(app):
+    """Основная база и реплики: слушатели выполнения запросов подключаются ко всем."""
+    engines = [app.extensions["sqlalchemy"].engine]
+    replicas = app.extensions.get("replicas")
+    if replicas is not None:
+        engines += [replica.engine for replica in replicas.replicas]
+    return engines
+
+
+def init_replicas(app):
+    urls = app.config["DATABASE_REPLICA_URLS"]
+    if not urls:
+        return
+
+    # Метрики пула (/metrics) относятся к основной базе, у реплик обычный QueuePool
+    from .metrics import InstrumentedQueuePool
+    options = dict(app.config["SQLALCHEMY_ENGINE_OPTIONS"])
+    if options.get("poolclass") is InstrumentedQueuePool:
+        del options["poolclass"]
+    replicas = ReplicaSet([
+        Replica(create_engine(url, **options), app.config["REPLICA_CHECK_INTERVAL"],
+                app.config["REPLICA_RETRY_SECONDS"])
+        for url in urls
+    ])
+    app.extensions["replicas"] = replicas
+    sticky_seconds = app.config["REPLICA_STICKY_SECONDS"]
+
+    @app.before_request
+    def allow_replica_reads():
+        # Чтение своих записей: недавно изменявший данные клиент читает из основной базы
+        if session.get("primary_until", 0) > time.time():
+            return
+        g.replica_reads = "all" if request.method in READ_METHODS else "views"
+
+    @app.after_request
+    def stick_to_primary(response):
+        if request.method not in READ_METHODS and response.status_code < 400:
+            session["primary_until"] = time.time() + sticky_seconds
+        return response
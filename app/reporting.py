@@ -0,0 +1,130 @@
+# app/reporting.py
+# Материализованные представления для отчетов (только PostgreSQL, MATERIALIZED_VIEWS=1).
+# event_results_view и school_points_view хранятся как MATERIALIZED VIEW с
+# уникальными индексами и обновляются REFRESH MATERIALIZED VIEW CONCURRENTLY
+# (чтение во время обновления не блокируется). Обновление запускает фоновый
+# поток после commit, изменившего исходные таблицы, с задержкой: серия записей
+# (например, ввод протокола) приводит к одному обновлению. Время последнего
+# обновления хранится в таблице view_refreshes и выводится на страницах.
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import Column, DateTime, MetaData, String, Table, func, select
+from sqlalchemy.sql import text
+
+from . import db
+from .changes import on_commit
+from .http_cache import bump_versions
+
+REPORTING_VIEWS = ("event_results_view", "school_points_view")
+
+# Таблицы, из которых строятся представления
+SOURCE_TABLES = {"results", "events", "sports", "teachers", "participants", "schools", "categories"}
+
+# Уникальные индексы обязательны для REFRESH ... CONCURRENTLY
+VIEW_INDEXES = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_event_results_view ON public.event_results_view (result_id)",
+    "CREATE INDEX IF NOT EXISTS ix_event_results_view_date ON public.event_results_view (date, event_id, result_id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_school_points_view ON public.school_points_view (school_id)",
+)
+
+view_refreshes = Table(
+    "view_refreshes", MetaData(schema="public"),
+    Column("view_name", String(100), primary_key=True),
+    Column("refreshed_at", DateTime, nullable=False),
+)
+
+
+def materialized_views_enabled(engine=None):
+    engine = engine or db.engine
+    return current_app.config["MATERIALIZED_VIEWS"] and engine.dialect.name == "postgresql"
+
+
+def record_refresh(connection):
+    now = datetime.now()
+    connection.execute(view_refreshes.delete())
+    connection.execute(view_refreshes.insert(), [
+        {"view_name": name, "refreshed_at": now} for name in REPORTING_VIEWS
+    ])
+
+
+def refresh_views(connection):
+    """Обновляет материализованные представления в транзакции connection."""
+    for name in REPORTING_VIEWS:
+        connection.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY public.{name}"))
+    record_refresh(connection)
+
+
+class ViewRefresher:
+    def __init__(self, engine, delay, max_delay, bump_table_versions=True):
+        self.engine = engine
+        # Увеличивать версии представлений для HTTP-кэша (есть таблица table_versions)
+        self.bump_table_versions = bump_table_versions
+        self.delay = delay
+        self.max_delay = max_delay
+        self.pending_since = None
+        self._last_request = 0.0
+        self._wakeup = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="view-refresher", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        return self.pending_since is not None
+
+    def request(self):
+        with self._wakeup:
+            now = time.monotonic()
+            self._last_request = now
+            if self.pending_since is None:
+                self.pending_since = now
+            self._wakeup.notify()
+
+    def _due(self):
+        # Ждем паузы в записи delay секунд, но не дольше max_delay с первого запроса
+        now = time.monotonic()
+        return (now - self._last_request >= self.delay
+                or now - self.pending_since >= self.max_delay)
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while self.pending_since is None or not self._due():
+                    self._wakeup.wait(self.delay if self.pending_since is not None else None)
+                self.pending_since = None
+            try:
+                with self.engine.begin() as connection:
+                    refresh_views(connection)
+                    if self.bump_table_versions:
+                        bump_versions(connection, REPORTING_VIEWS)
+            except Exception as e:
+                print(f"Failed to refresh reporting views: {e}")
+
+
+_refresher = None
+
+
+@on_commit
+def _request_refresh(tables):
+    if _refresher is not None and tables & SOURCE_TABLES:
+        _refresher.request()
+
+
+def view_status():
+    """Сведения для индикатора устаревания; None для обычных представлений."""
+    if _refresher is None:
+        return None
+    return {
+        "refreshed_at": db.session.scalar(select(func.min(view_refreshes.c.refreshed_at))),
+        "pending": _refresher.pending,
+    }
+
+
+def init_reporting(app):
+    global _refresher
+    if materialized_views_enabled():
+        _refresher = ViewRefresher(db.engine, app.config["VIEW_REFRESH_DELAY"],
+                                   app.config["VIEW_REFRESH_MAX_DELAY"],
+                                   bump_table_versions=app.extensions["http_cache"].enabled)
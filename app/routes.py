@@ -1,16 +1,34 @@
 # app/routes.py
-from flask import render_template, request, redirect, url_for, flash
-from app import db
+from flask import Response, render_template, stream_template, request, redirect, url_for, flash, jsonify
+from app import db, exports
 from app.models import (
-    School, Class, Participant, Sport, Event, Teacher,
+    School, Class, Participant, Sport, Event, Teacher, Rank, ParticipantRank,
     Category, EventResultsView, SchoolPointsView, EventParticipant, Result
 )
 from app.forms import (
     SchoolForm, ClassForm, ParticipantForm, TeacherForm,
-    EventCreationForm, SportForm, CategoryForm, ResultForm
+    EventCreationForm, SportForm, CategoryForm, ResultForm, ResultProtocolForm, ImportForm, RankForm
 )
-from datetime import datetime
-from sqlalchemy.sql import text
+from app.choices import (
+    school_choices, teacher_choices, class_choices, sport_choices,
+    category_choices, participant_choices
+)
+from app.audit import audit
+from app.eligibility import event_eligibility
+from app.fragments import STANDINGS_KEY, event_keys, fragment, invalidate_event
+from app.http_cache import cached_page
+from app.importer import import_file
+from app.live import stream as live_stream
+from app.pagination import paginate, paginate_stream
+from app.protocols import read_protocol, parse_time, parse_protocol, save_protocol
+from app.qualification import qualify
+from app.ranking import rank_results
+from app.registrations import register, registration_count, unregister
+from app.reporting import view_status
+from app.search import ENTITIES as SEARCH_ENTITIES, search
+from app.standings import standings_query
+from datetime import date
+from sqlalchemy import func, select
 
 def register_routes(app):
     @app.route("/")
@@ -19,8 +37,9 @@ def register_routes(app):
 
     # Основные сущности
     @app.route("/schools")
+    @cached_page("schools")
     def schools():
-        schools = School.query.all()
+        schools = School.list_query().all()
         return render_template("schools.html", schools=schools)
 
     @app.route("/add_school", methods=["GET", "POST"])
@@ -33,14 +52,17 @@ def register_routes(app):
                 contact_phone=form.contact_phone.data
             )
             db.session.add(school)
+            db.session.flush()
+            audit(f"create school {school.school_id}: {school.name}")
             db.session.commit()
             flash('Школа успешно добавлена', 'success')
             return redirect(url_for('schools'))
         return render_template("add_school.html", form=form)
 
     @app.route("/sports")
+    @cached_page("sports")
     def sports():
-        sports = Sport.query.all()
+        sports = Sport.list_query().all()
         return render_template("sports.html", sports=sports)
 
     @app.route("/add_sport", methods=["GET", "POST"])
@@ -52,20 +74,66 @@ def register_routes(app):
                 description=form.description.data
             )
             db.session.add(sport)
+            db.session.flush()
+            audit(f"create sport {sport.sport_id}: {sport.name}")
             db.session.commit()
             flash('Вид спорта успешно добавлен', 'success')
             return redirect(url_for('sports'))
         return render_template("add_sport.html", form=form)
 
+    @app.route("/ranks")
+    @cached_page("ranks", "participant_ranks", "sports")
+    def ranks():
+        holders = (
+            select(ParticipantRank.rank_id, func.count().label("holders"))
+            .group_by(ParticipantRank.rank_id)
+            .subquery()
+        )
+        ranks = db.session.execute(
+            select(Rank.rank_id, Rank.name, Rank.min_points, Sport.name.label("sport_name"),
+                   func.coalesce(holders.c.holders, 0).label("holders"))
+            .join(Sport, Sport.sport_id == Rank.sport_id)
+            .outerjoin(holders, holders.c.rank_id == Rank.rank_id)
+            .order_by(Sport.name, Rank.min_points)
+        ).all()
+        return render_template("ranks.html", ranks=ranks)
+
+    @app.route("/add_rank", methods=["GET", "POST"])
+    def add_rank():
+        form = RankForm()
+        form.sport_id.choices = sport_choices()
+        if form.validate_on_submit():
+            try:
+                rank = Rank(
+                    sport_id=form.sport_id.data,
+                    name=form.name.data,
+                    min_points=form.min_points.data
+                )
+                db.session.add(rank)
+                db.session.flush()
+                # Новый разряд сразу присваивается набравшим очки участникам
+                assigned = qualify(sport_id=rank.sport_id)
+                audit(f"create rank {rank.rank_id}: {rank.name}, assigned: {assigned}")
+                db.session.commit()
+                flash(f'Разряд добавлен, присвоен участникам: {assigned}', 'success')
+                return redirect(url_for('ranks'))
+            except Exception as e:
+                db.session.rollback()
+                flash(f'Ошибка при добавлении разряда: {str(e)}', 'error')
+        return render_template("add_rank.html", form=form)
+
     @app.route("/teachers")
     def teachers():
-        teachers = Teacher.query.all()
+        teachers = paginate(Teacher.list_query(), {
+            "id": (Teacher.teacher_id,),
+            "name": (Teacher.last_name, Teacher.first_name, Teacher.teacher_id),
+        }, default_sort="name")
         return render_template("teachers.html", teachers=teachers)
 
     @app.route("/add_teacher", methods=["GET", "POST"])
     def add_teacher():
         form = TeacherForm()
-        form.school_id.choices = [(s.school_id, s.name) for s in School.query.all()]
+        form.school_id.choices = school_choices()
         if form.validate_on_submit():
             teacher = Teacher(
                 school_id=form.school_id.data,
@@ -74,6 +142,8 @@ def register_routes(app):
                 phone=form.phone.data
             )
             db.session.add(teacher)
+            db.session.flush()
+            audit(f"create teacher {teacher.teacher_id}: {teacher.first_name} {teacher.last_name}")
             db.session.commit()
             flash('Учитель успешно добавлен', 'success')
             return redirect(url_for('teachers'))
@@ -81,15 +151,17 @@ def register_routes(app):
 
     @app.route("/classes")
     def classes():
-        classes = Class.query.all()
+        classes = paginate(Class.list_query(), {
+            "id": (Class.class_id,),
+            "name": (Class.name, Class.class_id),
+        }, default_sort="name")
         return render_template("classes.html", classes=classes)
 
     @app.route("/add_class", methods=["GET", "POST"])
     def add_class():
         form = ClassForm()
-        form.school_id.choices = [(s.school_id, s.name) for s in School.query.all()]
-        form.teacher_id.choices = [(t.teacher_id, f"{t.first_name} {t.last_name}")
-                                   for t in Teacher.query.all()]
+        form.school_id.choices = school_choices()
+        form.teacher_id.choices = teacher_choices()
 
         if form.validate_on_submit():
             class_ = Class(
@@ -99,6 +171,8 @@ def register_routes(app):
                 teacher_id=form.teacher_id.data
             )
             db.session.add(class_)
+            db.session.flush()
+            audit(f"create class {class_.class_id}: {class_.name}")
             db.session.commit()
             flash('Класс успешно добавлен', 'success')
             return redirect(url_for('classes'))
@@ -106,14 +180,17 @@ def register_routes(app):
 
     @app.route("/participants")
     def participants():
-        participants = Participant.query.all()
+        participants = paginate(Participant.list_query(), {
+            "id": (Participant.participant_id,),
+            "name": (Participant.last_name, Participant.first_name, Participant.participant_id),
+        }, default_sort="name")
         return render_template("participants.html", participants=participants)
 
     @app.route("/add_participant", methods=["GET", "POST"])
     def add_participant():
         form = ParticipantForm()
-        form.school_id.choices = [(s.school_id, s.name) for s in School.query.all()]
-        form.class_id.choices = [(c.class_id, c.name) for c in Class.query.all()]
+        form.school_id.choices = school_choices()
+        form.class_id.choices = class_choices()
         if form.validate_on_submit():
             participant = Participant(
                 school_id=form.school_id.data,
@@ -124,18 +201,40 @@ def register_routes(app):
                 gender=form.gender.data
             )
             db.session.add(participant)
+            db.session.flush()
+            audit(f"create participant {participant.participant_id}: {participant.first_name} {participant.last_name}")
             db.session.commit()
             flash('Участник успешно добавлен', 'success')
             return redirect(url_for('participants'))
         return render_template("add_participant.html", form=form)
 
+    @app.route("/import", methods=["GET", "POST"])
+    def import_data():
+        form = ImportForm()
+        report = None
+        if form.validate_on_submit():
+            try:
+                report = import_file(form.kind.data, form.file.data.stream, form.file.data.filename,
+                                     partial=form.partial.data)
+                if report.errors and not form.partial.data:
+                    db.session.rollback()
+                    flash(f'Найдено ошибок: {len(report.errors)}, данные не загружены', 'error')
+                else:
+                    db.session.commit()
+                    flash(f'Загружено строк: {report.inserted}', 'success')
+            except Exception as e:
+                db.session.rollback()
+                flash(f'Ошибка при импорте: {str(e)}', 'error')
+        return render_template("import.html", form=form, report=report)
+
     # Мероприятия
     @app.route("/events")
+    @cached_page("events", "sports", "teachers")
     def events():
-        events = Event.query.options(
-            db.joinedload(Event.sport),
-            db.joinedload(Event.responsible)
-        ).all()
+        events = paginate(Event.list_query(), {
+            "date": (Event.date, Event.event_id),
+            "name": (Event.name, Event.event_id),
+        }, default_sort="date")
         return render_template("events.html", events=events)
 
     @app.route("/create_event", methods=["GET", "POST"])
@@ -143,12 +242,13 @@ def register_routes(app):
         form = EventCreationForm()
 
         # Заполняем выпадающие списки
-        form.sport_id.choices = [(s.sport_id, s.name) for s in Sport.query.all()]
-        form.responsible_id.choices = [(t.teacher_id, f"{t.first_name} {t.last_name}")
-                                     for t in Teacher.query.all()]
-        form.participants.choices = [(p.participant_id, f"{p.first_name} {p.last_name}")
-                                   for p in Participant.query.all()]
-        form.categories.choices = [(c.category_id, c.name) for c in Category.query.all()]
+        form.sport_id.choices = sport_choices()
+        form.responsible_id.choices = teacher_choices()
+        form.categories.choices = category_choices()
+        form.classes.choices = class_choices()
+        form.schools.choices = school_choices()
+        # Участники выбираются через поиск, в форму попадают только выбранные
+        form.participants.choices = participant_choices(form.participants.data)
 
         if form.validate_on_submit():
             try:
@@ -164,15 +264,17 @@ def register_routes(app):
                 db.session.add(event)
                 db.session.flush()  # Получаем event_id
 
-                # Добавляем участников
-                for participant_id in form.participants.data:
-                    event_participant = EventParticipant(
-                        event_id=event.event_id,
-                        participant_id=participant_id,
-                        registration_date=datetime.now()
-                    )
-                    db.session.add(event_participant)
+                # Регистрируем участников одним INSERT ... SELECT
+                registered = register(
+                    event,
+                    participant_ids=form.participants.data,
+                    class_ids=form.classes.data,
+                    school_ids=form.schools.data,
+                    category_ids=form.categories.data if form.by_categories.data else (),
+                )
 
+                invalidate_event(event.event_id)
+                audit(f"create event {event.event_id}: {event.name}, participants: {registered}")
                 db.session.commit()
                 flash('Мероприятие успешно создано', 'success')
                 return redirect(url_for('events'))
@@ -182,63 +284,112 @@ def register_routes(app):
 
         return render_template("create_event.html", form=form)
 
+    @app.route("/api/events/<int:event_id>/registrations", methods=["POST", "DELETE"])
+    def event_registrations(event_id):
+        event = Event.query.get_or_404(event_id)
+        data = request.get_json(silent=True) or {}
+        try:
+            ids = {name: [int(value) for value in data.get(name) or ()]
+                   for name in ("participant_ids", "class_ids", "school_ids", "category_ids")}
+        except (TypeError, ValueError):
+            return jsonify({"error": "ids must be integers"}), 400
+
+        if request.method == "DELETE":
+            if not ids["participant_ids"]:
+                return jsonify({"error": "participant_ids required"}), 400
+            changed = unregister(event_id, ids["participant_ids"])
+            key, action = "removed", "remove"
+        else:
+            try:
+                changed = register(event, **ids)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            key, action = "added", "add"
+        if changed:
+            audit(f"{action} {changed} registrations, event {event_id}")
+        db.session.commit()
+        return jsonify({key: changed, "registered": registration_count(event_id)})
+
+    @app.route("/participants/search")
+    def participants_search():
+        query = request.args.get("q", "")
+        if len(query.strip()) < 2:
+            return jsonify([])
+        return jsonify([{"id": participant_id, "text": label}
+                        for participant_id, label, _ in search("participant", query)])
+
+    @app.route("/api/search")
+    def api_search():
+        query = request.args.get("q", "")
+        kinds = request.args.get("type", ",".join(SEARCH_ENTITIES)).split(",")
+        if any(kind not in SEARCH_ENTITIES for kind in kinds):
+            return jsonify({"error": "unknown type"}), 400
+        limit = max(1, min(request.args.get("limit", 20, type=int), 100))
+
+        results = [
+            {"type": kind, "id": row_id, "label": label, "score": round(float(score), 3)}
+            for kind in kinds
+            for row_id, label, score in search(kind, query, limit)
+        ]
+        results.sort(key=lambda item: -item["score"])
+        return jsonify({"results": results[:limit]})
+
     # Представления
     @app.route("/event_results")
+    @cached_page("results", "events", "sports", "teachers", "participants", "schools", "categories",
+                 "event_results_view")
     def event_results():
-        results = EventResultsView.query.all()
-        return render_template("event_results.html", results=results)
+        # Читаем строки представления без ORM и рендерим страницу потоком
+        view = EventResultsView.__table__
+        results = paginate_stream(db.session, select(view), {
+            "date": (view.c.date, view.c.event_id, view.c.result_id),
+        }, default_sort="date")
+        return stream_template("event_results.html", results=results, view_status=view_status())
 
     @app.route("/school_points")
+    @cached_page("schools", "school_points")
     def school_points():
         try:
-            # Используем прямой SQL запрос
-            sql = text("""
-            SELECT 
-                s.school_id,
-                s.name as school_name,
-                COUNT(DISTINCT e.event_id) as events_participated,
-                COUNT(r.result_id) as total_results,
-                COALESCE(SUM(r.points), 0) as total_points,
-                CASE 
-                    WHEN COUNT(r.result_id) > 0 THEN ROUND(AVG(r.points::numeric), 2)
-                    ELSE 0 
-                END as avg_points
-            FROM schools s
-            LEFT JOIN participants p ON s.school_id = p.school_id
-            LEFT JOIN results r ON p.participant_id = r.participant_id
-            LEFT JOIN events e ON r.event_id = e.event_id
-            GROUP BY s.school_id, s.name
-            ORDER BY total_points DESC
-            """)
-            
-            # Создаем список объектов для шаблона
-            points = []
-            results = db.session.execute(sql)
-            
-            for row in results:
-                point = type('SchoolPoint', (), {
-                    'school_name': row.school_name,
-                    'events_participated': row.events_participated,
-                    'total_results': row.total_results,
-                    'total_points': row.total_points,
-                    'avg_points': row.avg_points
-                })
-                points.append(point)
-                
-            print(f"Points to display: {len(points)}")
-            for p in points:
-                print(f"School: {p.school_name}, Points: {p.total_points}")
-                
-            return render_template("school_points.html", points=points)
-            
+            # Читаем инкрементально поддерживаемую таблицу school_points
+            points_table = fragment(STANDINGS_KEY, lambda: render_template(
+                "_school_points_table.html", points=standings_query().all()))
+            return render_template("school_points.html", points_table=points_table)
+
         except Exception as e:
             print(f"Error in school_points route: {e}")
             flash(f"Произошла ошибка при получении данных: {str(e)}", "error")
-            return render_template("school_points.html", points=[])
+            return render_template("school_points.html", points_table=render_template(
+                "_school_points_table.html", points=[]))
+
+    # Выгрузка протоколов в CSV/XLSX
+    @app.route("/event/<int:event_id>/export/results.<any(csv, xlsx):fmt>")
+    def export_event_results(event_id, fmt):
+        Event.query.get_or_404(event_id)
+        return exports.export_response(exports.event_results(event_id), fmt,
+                                       f"event-{event_id}-results", "Результаты")
+
+    @app.route("/event/<int:event_id>/export/registrations.<any(csv, xlsx):fmt>")
+    def export_event_registrations(event_id, fmt):
+        Event.query.get_or_404(event_id)
+        return exports.export_response(exports.event_registrations(event_id), fmt,
+                                       f"event-{event_id}-registrations", "Участники")
+
+    @app.route("/event_results/export.<any(csv, xlsx):fmt>")
+    def export_season_results(fmt):
+        # Необязательный период, ГГГГ-ММ-ДД; некорректная дата не учитывается
+        date_from = request.args.get("date_from", type=date.fromisoformat)
+        date_to = request.args.get("date_to", type=date.fromisoformat)
+        return exports.export_response(exports.season_results(date_from, date_to), fmt,
+                                       "results", "Результаты")
+
+    @app.route("/school_points/export.<any(csv, xlsx):fmt>")
+    def export_school_points(fmt):
+        return exports.export_response(exports.school_standings(), fmt, "school-points", "Очки школ")
 
     @app.route("/categories")
+    @cached_page("categories")
     def categories():
-        categories = Category.query.all()
+        categories = Category.list_query().all()
         return render_template("categories.html", categories=categories)
 
     @app.route("/add_category", methods=["GET", "POST"])
@@ -252,6 +403,8 @@ def register_routes(app):
                 gender=form.gender.data if form.gender.data else None
             )
             db.session.add(category)
+            db.session.flush()
+            audit(f"create category {category.category_id}: {category.name}")
             db.session.commit()
             flash('Категория успешно добавлена', 'success')
             return redirect(url_for('categories'))
@@ -259,22 +412,44 @@ def register_routes(app):
 
     @app.route("/event/<int:event_id>")
     def event_details(event_id):
-        event = Event.query.options(
-            db.joinedload(Event.sport),
-            db.joinedload(Event.responsible),
-            db.joinedload(Event.event_participants_rel).joinedload(EventParticipant.participant)
-        ).get_or_404(event_id)
-
-        # Получаем уже добавленные результаты с подгрузкой связанных данных
-        results = db.session.query(Result).filter_by(event_id=event_id).options(
-            db.joinedload(Result.participant).joinedload(Participant.school),
-            db.joinedload(Result.participant).joinedload(Participant.class_),
-            db.joinedload(Result.category)
-        ).all()
+        event = Event.query.get_or_404(event_id)
+        results_key, registrations_key = event_keys(event_id)
+
+        # Таблицы рендерятся только при промахе кэша фрагментов
+        def render_results():
+            results = db.session.query(Result).filter_by(event_id=event_id).options(
+                db.joinedload(Result.participant).joinedload(Participant.school),
+                db.joinedload(Result.participant).joinedload(Participant.class_),
+                db.joinedload(Result.category)
+            ).all()
+            return render_template("_event_results.html", results=results)
+
+        def render_registrations():
+            registrations = EventParticipant.query.filter_by(event_id=event_id).options(
+                db.joinedload(EventParticipant.participant).joinedload(Participant.school),
+                db.joinedload(EventParticipant.participant).joinedload(Participant.class_)
+            ).all()
+            with_results = set(db.session.scalars(
+                select(Result.participant_id).where(Result.event_id == event_id)
+            ))
+            return render_template("_event_registrations.html", event=event,
+                                   registrations=registrations, with_results=with_results)
 
         return render_template("event_details.html",
                                event=event,
-                               results=results)
+                               # Трансляция результатов нужна только в день мероприятия
+                               live=event.date == date.today(),
+                               results_table=fragment(results_key, render_results),
+                               registrations_table=fragment(registrations_key, render_registrations))
+
+    @app.route("/event/<int:event_id>/live")
+    def event_live(event_id):
+        # Поток server-sent events: новые и измененные результаты мероприятия
+        Event.query.get_or_404(event_id)
+        db.session.remove()  # соединение с базой не держим, пока зритель подключен
+        return Response(live_stream(event_id, app.config["LIVE_STREAM_SECONDS"]),
+                        mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
     @app.route("/event/<int:event_id>/add_result/<int:participant_id>", methods=["GET", "POST"])
     def add_result(event_id, participant_id):
@@ -290,24 +465,26 @@ def register_routes(app):
             flash('Участник не зарегистрирован на это мероприятие', 'error')
             return redirect(url_for('event_details', event_id=event_id))
 
-        # Заполняем выпадающие списки
-        form.category_id.choices = [(c.category_id, c.name) for c in Category.query.all()]
+        # Заполняем выпадающие списки; категория предлагается по возрасту и полу участника
+        form.category_id.choices = category_choices()
+        if not form.is_submitted():
+            form.category_id.data = event_eligibility(event_id).default(participant_id)
 
         if form.validate_on_submit():
             try:
-                # Преобразуем строку времени в INTERVAL
-                h, m, s = map(int, form.time.data.split(':'))
-                time_str = f"{h} hours {m} minutes {s} seconds"
-
                 result = Result(
                     event_id=event_id,
                     participant_id=participant_id,
                     category_id=form.category_id.data,
-                    time=time_str,
-                    points=form.points.data,
-                    place=form.place.data
+                    time=parse_time(form.time.data),
+                    points=0,
+                    place=0
                 )
                 db.session.add(result)
+                db.session.flush()
+                # Места, очки и очки школ пересчитываются в той же транзакции
+                rank_results(event_id, [result.category_id])
+                audit(f"create result {result.result_id}: event {event_id}, participant {participant_id}")
                 db.session.commit()
                 flash('Результат успешно добавлен', 'success')
                 return redirect(url_for('event_details', event_id=event_id))
@@ -315,4 +492,82 @@ def register_routes(app):
                 db.session.rollback()
                 flash(f'Ошибка при добавлении результата: {str(e)}', 'error')
 
-        return render_template("add_result.html", form=form, event_id=event_id)
\ No newline at end of file
+        return render_template("add_result.html", form=form, event_id=event_id)
+
+    @app.route("/result/<int:result_id>/edit", methods=["GET", "POST"])
+    def edit_result(result_id):
+        result = Result.query.get_or_404(result_id)
+        form = ResultForm(obj=result)
+        form.category_id.choices = category_choices()
+        if request.method == "GET":
+            form.time.data = result.formatted_time
+
+        if form.validate_on_submit():
+            try:
+                old_category_id = result.category_id
+                result.category_id = form.category_id.data
+                result.time = parse_time(form.time.data)
+                db.session.flush()
+                # Пересчитываем только затронутые категории мероприятия
+                rank_results(result.event_id, {old_category_id, result.category_id})
+                db.session.commit()
+                flash('Результат успешно изменен', 'success')
+                return redirect(url_for('event_details', event_id=result.event_id))
+            except Exception as e:
+                db.session.rollback()
+                flash(f'Ошибка при изменении результата: {str(e)}', 'error')
+
+        return render_template("add_result.html", form=form, event_id=result.event_id,
+                               title='Изменение результата')
+
+    @app.route("/event/<int:event_id>/add_results", methods=["GET", "POST"])
+    def add_results(event_id):
+        form = ResultProtocolForm()
+        event = Event.query.get_or_404(event_id)
+
+        # Зарегистрированные участники, у которых еще нет результата
+        pending = db.session.execute(
+            select(Participant.participant_id, Participant.first_name, Participant.last_name)
+            .join(EventParticipant, EventParticipant.participant_id == Participant.participant_id)
+            .outerjoin(Result, (Result.participant_id == Participant.participant_id)
+                       & (Result.event_id == event_id))
+            .where(EventParticipant.event_id == event_id, Result.result_id.is_(None))
+            .order_by(Participant.last_name, Participant.first_name)
+        ).all()
+        categories = category_choices()
+
+        errors = []
+        if form.validate_on_submit():
+            if form.protocol.data:
+                try:
+                    raw_rows = read_protocol(form.protocol.data.stream, form.protocol.data.filename)
+                except ValueError as e:
+                    raw_rows = []
+                    flash(str(e), 'error')
+            else:
+                # Строки таблицы на странице; пустое время - участник пропущен
+                raw_rows = [
+                    (number, {
+                        "participant_id": participant_id,
+                        "category_id": request.form.get(f"category_{participant_id}"),
+                        "time": request.form.get(f"time_{participant_id}"),
+                    })
+                    for number, participant_id in enumerate(request.form.getlist("participant_id"), start=1)
+                    if (request.form.get(f"time_{participant_id}") or "").strip()
+                ]
+
+            rows, errors = parse_protocol(raw_rows)
+            try:
+                errors = save_protocol(event_id, rows, errors)
+                if not errors:
+                    audit(f"create results: event {event_id}, count {len(rows)}")
+                    db.session.commit()
+                    flash(f'Добавлено результатов: {len(rows)}', 'success')
+                    return redirect(url_for('event_details', event_id=event_id))
+                db.session.rollback()
+            except Exception as e:
+                db.session.rollback()
+                flash(f'Ошибка при добавлении результатов: {str(e)}', 'error')
+
+        return render_template("add_results.html", form=form, event=event, pending=pending,
+                               categories=categories, eligibility=event_eligibility(event_id), errors=errors)
@@ -0,0 +1,128 @@
+# app/search.py
+# Поиск участников, учителей и школ по имени/названию.
+# В PostgreSQL используются триграммные GIN-индексы pg_trgm (оператор <% и
+# word_similarity). В остальных базах (SQLite, тесты) - n-граммный индекс в памяти
+# процесса, который строится при первом запросе и сбрасывается после commit,
+# изменившего соответствующую таблицу.
+import heapq
+import re
+import threading
+from collections import Counter, defaultdict
+
+from sqlalchemy import func, literal, literal_column, select
+from sqlalchemy.sql import text
+
+from . import db
+from .changes import on_commit
+from .models import Participant, Teacher, School
+
+# Такой же порог по умолчанию, как у pg_trgm.word_similarity_threshold
+SIMILARITY_THRESHOLD = 0.6
+DEFAULT_LIMIT = 20
+
+
+def _full_name(model):
+    # Пробел - литерал, а не параметр, чтобы выражение совпадало с выражением индекса
+    return model.first_name + literal_column("' '") + model.last_name
+
+
+# Тип -> (таблица, колонка id, выражение подписи)
+ENTITIES = {
+    "participant": ("participants", lambda: Participant.participant_id, lambda: _full_name(Participant)),
+    "teacher": ("teachers", lambda: Teacher.teacher_id, lambda: _full_name(Teacher)),
+    "school": ("schools", lambda: School.school_id, lambda: School.name),
+}
+
+# Индексы для PostgreSQL; выражения совпадают с _full_name()
+TRGM_INDEXES = {
+    "ix_participants_name_trgm": "public.participants USING gin ((first_name || ' ' || last_name) gin_trgm_ops)",
+    "ix_teachers_name_trgm": "public.teachers USING gin ((first_name || ' ' || last_name) gin_trgm_ops)",
+    "ix_schools_name_trgm": "public.schools USING gin (name gin_trgm_ops)",
+}
+
+
+def trigrams(value):
+    """Триграммы строки по правилам pg_trgm: слова в нижнем регистре с отступами."""
+    result = set()
+    for word in re.findall(r"\w+", value.lower()):
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+class NgramIndex:
+    def __init__(self, rows):
+        self.labels = {}
+        self.postings = defaultdict(set)
+        for row_id, label in rows:
+            self.labels[row_id] = label
+            for gram in trigrams(label):
+                self.postings[gram].add(row_id)
+
+    def search(self, query, limit):
+        grams = trigrams(query)
+        if not grams:
+            return []
+        counts = Counter()
+        for gram in grams:
+            counts.update(self.postings.get(gram, ()))
+        matches = (
+            (count / len(grams), row_id) for row_id, count in counts.items()
+            if count / len(grams) >= SIMILARITY_THRESHOLD
+        )
+        best = heapq.nlargest(limit, matches, key=lambda match: (match[0], -match[1]))
+        return [(row_id, self.labels[row_id], score) for score, row_id in best]
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def _memory_index(kind):
+    index = _indexes.get(kind)
+    if index is None:
+        _, id_column, label = ENTITIES[kind]
+        index = NgramIndex(db.session.execute(select(id_column(), label())))
+        with _lock:
+            _indexes[kind] = index
+    return index
+
+
+@on_commit
+def _invalidate_changed(tables):
+    with _lock:
+        for kind, (table, _, _) in ENTITIES.items():
+            if table in tables:
+                _indexes.pop(kind, None)
+
+
+def _search_trgm(kind, query, limit):
+    _, id_column, label = ENTITIES[kind]
+    label = label()
+    score = func.word_similarity(query, label)
+    return [tuple(row) for row in db.session.execute(
+        select(id_column(), label, score)
+        # Скобки обязательны: <% и || имеют одинаковый приоритет
+        .where(literal(query).op("<%", is_comparison=True)(label.self_group()))
+        .order_by(score.desc(), label)
+        .limit(limit)
+    )]
+
+
+def search(kind, query, limit=DEFAULT_LIMIT):
+    """Возвращает до limit совпадений [(id, подпись, оценка)], лучшие первыми."""
+    query = query.strip()
+    if not query:
+        return []
+    if db.engine.dialect.name == "postgresql":
+        return _search_trgm(kind, query, limit)
+    return _memory_index(kind).search(query, limit)
+
+
+def create_trgm_indexes():
+    """Создает расширение pg_trgm и триграммные индексы (только PostgreSQL)."""
+    if db.engine.dialect.name != "postgresql":
+        return
+    db.session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for name, definition in TRGM_INDEXES.items():
+        db.session.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}"))
@@ -0,0 +1,232 @@
+# app/seeding.py
+# Генератор тестовых данных заданного масштаба для нагрузочных замеров.
+# Создает школы, учителей, классы, участников, мероприятия, регистрации и
+# результаты с правдоподобными распределениями (возраст по классу, время по
+# виду спорта и дистанции) и загружает их через bulk_insert (COPY в PostgreSQL).
+# Данные добавляются к существующим: id выдаются после текущих максимальных.
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.sql import text
+
+from . import db
+from .importer import GENDERS, bulk_insert
+from .models import (
+    School, Teacher, Class, Participant, Sport, Category, Event, EventParticipant, Result
+)
+from .ranking import rank_results
+
+FIRST_NAMES = {
+    "M": ["Александр", "Максим", "Иван", "Артем", "Дмитрий", "Никита", "Михаил", "Даниил",
+          "Егор", "Андрей", "Кирилл", "Илья", "Матвей", "Роман", "Сергей"],
+    "F": ["Анастасия", "Мария", "Анна", "Виктория", "Полина", "Елизавета", "Екатерина",
+          "Дарья", "Софья", "Алиса", "Ксения", "Варвара", "Вероника", "Алёна", "Ольга"],
+}
+LAST_NAMES = ["Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов",
+              "Михайлов", "Новиков", "Федоров", "Морозов", "Волков", "Алексеев", "Лебедев",
+              "Семенов", "Егоров", "Павлов", "Козлов", "Степанов", "Николаев", "Орлов"]
+STREETS = ["Ленина", "Мира", "Садовая", "Школьная", "Лесная", "Советская", "Молодежная"]
+CLASS_LETTERS = "АБВГД"
+
+# Вид спорта -> (дистанции, км; средний темп, секунд на км)
+SPORTS = {
+    "Легкая атлетика": ((0.1, 1.0, 2.0, 3.0), 240),
+    "Лыжные гонки": ((1.0, 3.0, 5.0), 330),
+    "Плавание": ((0.05, 0.1), 1200),
+    "Велоспорт": ((5.0, 10.0), 120),
+    "Спортивное ориентирование": ((2.0, 4.0), 480),
+    "Кросс": ((1.0, 2.0, 3.0), 270),
+}
+
+# Возрастные категории: (мин. возраст, макс. возраст)
+AGE_BANDS = ((7, 10), (11, 14), (15, 18))
+
+
+def _female_last_name(last_name):
+    return last_name + "а"
+
+
+def _next_id(column):
+    return (db.session.scalar(select(func.max(column))) or 0) + 1
+
+
+def _age(birth_date, on_date):
+    return on_date.year - birth_date.year - ((on_date.month, on_date.day) < (birth_date.month, birth_date.day))
+
+
+def _reset_sequences(*columns):
+    # После вставки с явными id последовательности PostgreSQL нужно сдвинуть
+    if db.engine.dialect.name != "postgresql":
+        return
+    for column in columns:
+        table = column.table
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.schema}.{table.name}', '{column.name}'), "
+            f"COALESCE((SELECT MAX({column.name}) FROM {table.schema}.{table.name}), 1))"
+        ))
+
+
+class SeedReport:
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, table, count):
+        self.counts[table] = self.counts.get(table, 0) + count
+
+
+def _load(report, model, columns, rows):
+    rows = list(rows)
+    bulk_insert(model.__table__, columns, iter(rows))
+    report.add(model.__tablename__, len(rows))
+    return rows
+
+
+def _reference_data(report):
+    existing = set(db.session.scalars(select(Sport.name)))
+    _load(report, Sport, ("name", "description"), (
+        {"name": name, "description": None} for name in SPORTS if name not in existing
+    ))
+    if not db.session.scalar(select(func.count(Category.category_id))):
+        _load(report, Category, ("name", "min_age", "max_age", "gender"), (
+            {"name": f"{'Юноши' if gender == 'M' else 'Девушки'} {min_age}-{max_age}",
+             "min_age": min_age, "max_age": max_age, "gender": gender}
+            for gender in ("M", "F") for min_age, max_age in AGE_BANDS
+        ))
+
+
+def seed(schools=20, teachers_per_school=15, classes_per_school=22, participants_per_class=25,
+         events=50, registrations_per_event=200, results_ratio=0.9, random_seed=None, today=None):
+    """Генерирует и загружает данные; commit делает вызывающий код."""
+    rng = random.Random(random_seed)
+    today = today or date.today()
+    report = SeedReport()
+    _reference_data(report)
+
+    school_id = _next_id(School.school_id)
+    teacher_id = _next_id(Teacher.teacher_id)
+    class_id = _next_id(Class.class_id)
+    participant_id = _next_id(Participant.participant_id)
+
+    school_rows, teacher_rows, class_rows, participant_rows = [], [], [], []
+    for _ in range(schools):
+        school_rows.append({
+            "school_id": school_id,
+            "name": f"Школа №{school_id}",
+            "address": f"ул. {rng.choice(STREETS)}, {rng.randint(1, 120)}",
+            "contact_phone": f"+7{rng.randint(9000000000, 9999999999)}",
+        })
+        school_teachers = []
+        for _ in range(teachers_per_school):
+            gender = rng.choice("MF")
+            last_name = rng.choice(LAST_NAMES)
+            teacher_rows.append({
+                "teacher_id": teacher_id,
+                "school_id": school_id,
+                "first_name": rng.choice(FIRST_NAMES[gender]),
+                "last_name": _female_last_name(last_name) if gender == "F" else last_name,
+                "phone": f"+7{rng.randint(9000000000, 9999999999)}",
+            })
+            school_teachers.append(teacher_id)
+            teacher_id += 1
+
+        # Классы с 1-го по 11-й, несколько параллелей
+        for number in range(classes_per_school):
+            grade = number % 11 + 1
+            letter = CLASS_LETTERS[number // 11 % len(CLASS_LETTERS)]
+            class_rows.append({
+                "class_id": class_id,
+                "school_id": school_id,
+                "name": f"{grade}{letter}",
+                "year": today.year - grade + (1 if today.month >= 9 else 0),
+                "teacher_id": rng.choice(school_teachers),
+            })
+            size = max(1, int(rng.gauss(participants_per_class, participants_per_class * 0.15)))
+            for _ in range(size):
+                gender = rng.choice("MF")
+                last_name = rng.choice(LAST_NAMES)
+                # Возраст на 1 сентября: 7 лет в 1-м классе
+                birth_year = today.year - (1 if today.month < 9 else 0) - grade - 6
+                participant_rows.append({
+                    "participant_id": participant_id,
+                    "school_id": school_id,
+                    "class_id": class_id,
+                    "first_name": rng.choice(FIRST_NAMES[gender]),
+                    "last_name": _female_last_name(last_name) if gender == "F" else last_name,
+                    "birth_date": date(birth_year, 1, 1) + timedelta(days=rng.randrange(365)),
+                    "gender": gender,
+                })
+                participant_id += 1
+            class_id += 1
+        school_id += 1
+
+    _load(report, School, ("school_id", "name", "address", "contact_phone"), school_rows)
+    _load(report, Teacher, ("teacher_id", "school_id", "first_name", "last_name", "phone"), teacher_rows)
+    _load(report, Class, ("class_id", "school_id", "name", "year", "teacher_id"), class_rows)
+    _load(report, Participant, ("participant_id", "school_id", "class_id", "first_name", "last_name",
+                                "birth_date", "gender"), participant_rows)
+
+    sports = dict(db.session.execute(select(Sport.name, Sport.sport_id)).all())
+    categories = [
+        (category_id, min_age, max_age, GENDERS.get((gender or "").upper()))
+        for category_id, min_age, max_age, gender in db.session.execute(
+            select(Category.category_id, Category.min_age, Category.max_age, Category.gender))
+    ]
+
+    # Мероприятия учебного года; прошедшие получают результаты
+    season_start = date(today.year - (1 if today.month < 9 else 0), 9, 1)
+    event_id = _next_id(Event.event_id)
+    event_rows, registration_rows, result_rows = [], [], []
+    for _ in range(events):
+        sport_name = rng.choice(list(SPORTS))
+        distances, pace = SPORTS[sport_name]
+        distance = rng.choice(distances)
+        event_date = season_start + timedelta(days=rng.randrange(270))
+        event_rows.append({
+            "event_id": event_id,
+            "sport_id": sports[sport_name],
+            "name": f"{sport_name}, {distance:g} км - {event_date:%d.%m.%Y}",
+            "date": event_date,
+            "location": f"Стадион на ул. {rng.choice(STREETS)}",
+            "responsible_id": rng.choice(teacher_rows)["teacher_id"],
+            "distance": distance,
+        })
+
+        size = min(len(participant_rows), max(1, int(rng.gauss(registrations_per_event,
+                                                                registrations_per_event * 0.3))))
+        for participant in rng.sample(participant_rows, size):
+            registration_rows.append({
+                "event_id": event_id,
+                "participant_id": participant["participant_id"],
+                "registration_date": event_date - timedelta(days=rng.randint(1, 30)),
+            })
+            if event_date > today or rng.random() > results_ratio:
+                continue
+            age = _age(participant["birth_date"], event_date)
+            eligible = [category_id for category_id, min_age, max_age, gender in categories
+                        if min_age <= age <= max_age and gender in (None, participant["gender"])]
+            if not eligible:
+                continue
+            # Младшие медленнее, разброс внутри возраста - логнормальный
+            factor = rng.lognormvariate(0, 0.15) * (1 + max(0, 16 - age) * 0.04)
+            result_rows.append({
+                "event_id": event_id,
+                "participant_id": participant["participant_id"],
+                "category_id": rng.choice(eligible),
+                "time": timedelta(seconds=round(distance * pace * factor, 1)),
+                "points": 0,
+                "place": 0,
+            })
+        event_id += 1
+
+    _load(report, Event, ("event_id", "sport_id", "name", "date", "location", "responsible_id", "distance"),
+          event_rows)
+    _load(report, EventParticipant, ("event_id", "participant_id", "registration_date"), registration_rows)
+    _load(report, Result, ("event_id", "participant_id", "category_id", "time", "points", "place"), result_rows)
+    _reset_sequences(School.school_id, Teacher.teacher_id, Class.class_id, Participant.participant_id,
+                     Event.event_id)
+
+    # Места, очки и таблица очков школ
+    for ranked_event_id in {row["event_id"] for row in result_rows}:
+        rank_results(ranked_event_id)
+    return report
@@ -0,0 +1,90 @@
+# app/standings.py
+# Таблица очков школ (school_points), которая поддерживается по мероприятиям.
+# Одна строка на пару (школа, мероприятие): сумма очков и количество результатов.
+# После расстановки мест (ranking.rank_results) строки мероприятия пересчитываются
+# одним сгруппированным запросом: новый результат меняет очки других участников
+# категории, поэтому прибавить изменение по одному результату нельзя.
+from sqlalchemy import Numeric, case, cast, func
+from sqlalchemy.sql import text
+
+from . import db
+from .fragments import STANDINGS_KEY, invalidate
+from .models import School, SchoolPoint, Participant, Result
+
+
+def rebuild(event_id=None):
+    """Пересчитывает таблицу очков по таблице results (целиком или для одного мероприятия)."""
+    delete = SchoolPoint.query
+    source = db.session.query(
+        Participant.school_id,
+        Result.event_id,
+        func.coalesce(func.sum(Result.points), 0),
+        func.count(Result.result_id)
+    ).join(Participant, Participant.participant_id == Result.participant_id)
+
+    if event_id is not None:
+        delete = delete.filter(SchoolPoint.event_id == event_id)
+        source = source.filter(Result.event_id == event_id)
+
+    delete.delete(synchronize_session=False)
+    source = source.group_by(Participant.school_id, Result.event_id)
+
+    db.session.execute(
+        SchoolPoint.__table__.insert().from_select(
+            ["school_id", "event_id", "total_points", "results_count"],
+            source
+        )
+    )
+    invalidate(STANDINGS_KEY)
+
+
+def standings_query():
+    """Таблица очков школ: читает только school_points, без обхода results."""
+    total_results = func.coalesce(func.sum(SchoolPoint.results_count), 0)
+    total_points = func.coalesce(func.sum(SchoolPoint.total_points), 0)
+    return db.session.query(
+        School.school_id,
+        School.name.label("school_name"),
+        func.count(SchoolPoint.event_id).filter(SchoolPoint.results_count > 0).label("events_participated"),
+        total_results.label("total_results"),
+        total_points.label("total_points"),
+        case(
+            (total_results > 0, func.round(cast(total_points, Numeric) / total_results, 2)),
+            else_=0
+        ).label("avg_points")
+    ).outerjoin(
+        SchoolPoint, SchoolPoint.school_id == School.school_id
+    ).group_by(
+        School.school_id, School.name
+    ).order_by(
+        total_points.desc(), School.school_id
+    )
+
+
+def check():
+    """Сравнивает таблицу очков с представлением school_points_view.
+
+    Возвращает список расхождений (school_id, поле, значение в таблице, значение в представлении).
+    """
+    fields = ("events_participated", "total_results", "total_points", "avg_points")
+    expected = {
+        row.school_id: row
+        for row in db.session.execute(text(
+            "SELECT school_id, " + ", ".join(fields) + " FROM public.school_points_view"
+        ))
+    }
+
+    mismatches = []
+    for row in standings_query():
+        view_row = expected.pop(row.school_id, None)
+        if view_row is None:
+            mismatches.append((row.school_id, "school_id", row.school_id, None))
+            continue
+        for field in fields:
+            actual, wanted = getattr(row, field), getattr(view_row, field)
+            if round(float(actual or 0), 2) != round(float(wanted or 0), 2):
+                mismatches.append((row.school_id, field, actual, wanted))
+
+    for school_id in expected:
+        mismatches.append((school_id, "school_id", None, school_id))
+    return mismatches
@@ -0,0 +1,161 @@
+# app/tabular.py
+# Построчное чтение и потоковая запись табличных файлов (CSV и XLSX)
+# без загрузки файла в память целиком.
+import csv
+import io
+import itertools
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+
+def _read_csv(stream):
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(text, dialect=dialect)
+    # Номер строки файла с учетом заголовка
+    for number, row in enumerate(reader, start=2):
+        yield number, row
+
+
+def _read_xlsx(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Для чтения XLSX установите пакет openpyxl")
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else "" for value in next(rows, ())]
+        for number, values in enumerate(rows, start=2):
+            if all(value is None for value in values):
+                continue
+            yield number, {
+                name: "" if value is None else str(value)
+                for name, value in zip(header, values) if name
+            }
+    finally:
+        workbook.close()
+
+
+def read_rows(stream, filename):
+    """Итератор (номер строки, словарь колонка -> строка) по файлу CSV или XLSX."""
+    if filename.lower().endswith(".xlsx"):
+        return _read_xlsx(stream)
+    return _read_csv(stream)
+
+
+# Запись: генераторы байтов для потоковой отдачи файла.
+# Данные отдаются кусками не меньше CHUNK_SIZE, память не зависит от числа строк.
+CHUNK_SIZE = 64 * 1024
+
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def write_csv(header, rows):
+    """Генератор байтов CSV в UTF-8 с BOM (чтобы Excel распознал кодировку)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+class _Chunks(io.RawIOBase):
+    """Поток без перемотки: zipfile пишет в него, генератор забирает накопленное."""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def take(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        self.size = 0
+        return data
+
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="{sheet}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+}
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return "<c/>"
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    text = escape(_INVALID_XML.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def write_xlsx(header, rows, sheet="Лист1"):
+    """Генератор байтов XLSX с одним листом.
+
+    Файл собирается потоково: строки сразу пишутся в сжатый элемент архива,
+    готовые байты отдаются по мере накопления. Строки хранятся как inline-строки,
+    числа - как числа; стили не используются.
+    """
+    sheet = re.sub(r"[\[\]:*?/\\]", " ", sheet)[:31]
+    output = _Chunks()
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_PARTS.items():
+            archive.writestr(name, '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                             + content.replace("{sheet}", escape(sheet, {'"': "&quot;"})))
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as part:
+            part.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                       b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                       b'<sheetData>')
+            for row in itertools.chain([header], rows):
+                part.write(("<row>" + "".join(_xlsx_cell(value) for value in row) + "</row>").encode("utf-8"))
+                if output.size >= CHUNK_SIZE:
+                    yield output.take()
+            part.write(b"</sheetData></worksheet>")
+    yield output.take()
@@ -1,4 +1,6 @@
 from app import create_app, db
+from app.migrations import schema_version, upgrade
+from app.reporting import view_refreshes
 from sqlalchemy import inspect, text
 
 app = create_app()
@@ -10,11 +12,14 @@ with app.app_context():
     # Удаляем все представления вручную перед удалением таблиц
     for view_name in inspector.get_view_names(schema='public'):
         db.session.execute(text(f'DROP VIEW IF EXISTS public.{view_name} CASCADE'))
+    for view_name in inspector.get_materialized_view_names(schema='public'):
+        db.session.execute(text(f'DROP MATERIALIZED VIEW IF EXISTS public.{view_name} CASCADE'))
+    db.session.commit()
 
     # Теперь можем безопасно удалять таблицы
     db.drop_all()
+    schema_version.drop(db.engine, checkfirst=True)
+    view_refreshes.drop(db.engine, checkfirst=True)
 
-    # Создаем все таблицы заново
-    db.create_all()
-
-    db.session.commit()
\ No newline at end of file
+    # Создаем схему заново всеми миграциями
+    upgrade()
@@ -0,0 +1,128 @@
+# tests/conftest.py
+# Тесты выполняются на SQLite: схема public подключается через ATTACH к файлу
+# рядом с основной базой. Если задан TEST_DATABASE_URL, тесты используют эту
+# базу PostgreSQL; она должна быть отдельной - схема public пересоздается
+# перед каждым тестом.
+import os
+import sqlite3
+import subprocess
+import sys
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.dialects.postgresql import INTERVAL
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+
+os.environ.setdefault("SECRET_KEY", "test")
+
+from app import create_app  # noqa: E402
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# В SQLite нет INTERVAL: время результата хранится в секундах
+@compiles(INTERVAL, "sqlite")
+def _interval_sqlite(type_, compiler, **kw):
+    return "REAL"
+
+
+sqlite3.register_adapter(timedelta, lambda value: value.total_seconds())
+
+
+@event.listens_for(Engine, "connect")
+def _attach_public(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        path = dbapi_connection.execute("PRAGMA database_list").fetchone()[2]
+        dbapi_connection.execute("ATTACH DATABASE ? AS public", (f"{path}.public" if path else ":memory:",))
+
+
+def _reset_postgresql(url):
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text("DROP SCHEMA IF EXISTS public CASCADE"))
+        connection.execute(text("CREATE SCHEMA public"))
+    engine.dispose()
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    """URL пустой базы данных для теста."""
+    if TEST_DATABASE_URL:
+        _reset_postgresql(TEST_DATABASE_URL)
+        return TEST_DATABASE_URL
+    return f"sqlite:///{tmp_path / 'test.db'}"
+
+
+@pytest.fixture
+def make_app(database_url):
+    """Фабрика приложений на тестовой базе; аргументы - настройки поверх тестовых."""
+    def make(**config):
+        settings = {
+            "SQLALCHEMY_DATABASE_URI": database_url,
+            "TESTING": True,
+            "WTF_CSRF_ENABLED": False,
+            "AUTO_MIGRATE": True,
+        }
+        settings.update(config)
+        return create_app(settings)
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def standings(app):
+    """Очки школ по мероприятию: у второй школы (School №2) очков больше."""
+    from app import db
+    from app.models import Event, School, SchoolPoint, Sport, Teacher
+
+    with app.app_context():
+        first, second = db.session.query(School).order_by(School.school_id).all()
+        sport = Sport(name="Бег")
+        teacher = Teacher(first_name="Иван", last_name="Петров", school_id=first.school_id)
+        db.session.add_all([sport, teacher])
+        db.session.flush()
+        event = Event(sport_id=sport.sport_id, name="Кросс", date=date(2024, 5, 1),
+                      responsible_id=teacher.teacher_id, distance=1000)
+        db.session.add(event)
+        db.session.flush()
+        db.session.add_all([
+            SchoolPoint(school_id=first.school_id, event_id=event.event_id, total_points=10, results_count=2),
+            SchoolPoint(school_id=second.school_id, event_id=event.event_id, total_points=45, results_count=2),
+        ])
+        db.session.commit()
+        return [second.name, first.name]
+
+
+@pytest.fixture
+def other_process(database_url):
+    """Выполняет код в отдельном процессе с приложением app на той же базе.
+
+    Модели до create_app не импортируются, как при запуске сервера.
+    """
+    def run(code=""):
+        script = (
+            "import conftest\n"
+            "from app import create_app, db\n"
+            f"app = create_app({{'SQLALCHEMY_DATABASE_URI': {database_url!r}, 'AUTO_MIGRATE': True}})\n"
+            "with app.app_context():\n"
+            + "".join(f"    {line}\n" for line in code.splitlines())
+            + "    pass\n"
+        )
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(TESTS_DIR))
+        finished = subprocess.run([sys.executable, "-c", script], cwd=TESTS_DIR, env=env,
+                                  capture_output=True, text=True)
+        assert finished.returncode == 0, finished.stderr
+        return finished.stdout
+    return run
@@ -0,0 +1,27 @@
+import gzip
+import json
+
+from app import api
+
+
+def test_standings_ordered_by_points(client, standings):
+    response = client.get("/api/v1/standings")
+    assert response.status_code == 200
+    assert [row["school_name"] for row in response.get_json()["data"]] == standings
+
+
+def test_etag_differs_per_encoding(client, monkeypatch):
+    # Сжимается и короткий ответ
+    monkeypatch.setattr(api, "COMPRESS_MIN_BYTES", 0)
+    plain = client.get("/api/v1/schools")
+    compressed = client.get("/api/v1/schools", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(compressed.data)) == plain.get_json()
+    assert plain.headers["ETag"] != compressed.headers["ETag"]
+
+    # ETag несжатого ответа не подходит клиенту, принимающему gzip, и наоборот
+    assert client.get("/api/v1/schools", headers={"Accept-Encoding": "gzip",
+                                                  "If-None-Match": plain.headers["ETag"]}).status_code == 200
+    assert client.get("/api/v1/schools", headers={"If-None-Match": compressed.headers["ETag"]}).status_code == 200
+    assert client.get("/api/v1/schools", headers={"Accept-Encoding": "gzip",
+                                                  "If-None-Match": compressed.headers["ETag"]}).status_code == 304
@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app import db
+from app.explain import check_index_usage
+from app.models import Category, Class, Event, EventParticipant, Participant, Result, School, Sport, Teacher
+
+
+@pytest.fixture
+def results(app):
+    """Один результат: проверкам нужны id из базы."""
+    with app.app_context():
+        school = db.session.query(School).first()
+        teacher = Teacher(first_name="Иван", last_name="Петров", school_id=school.school_id)
+        sport = Sport(name="Бег")
+        category = Category(name="Все", min_age=5, max_age=20)
+        db.session.add_all([teacher, sport, category])
+        db.session.flush()
+        school_class = Class(school_id=school.school_id, name="5А", year=2024, teacher_id=teacher.teacher_id)
+        event = Event(sport_id=sport.sport_id, name="Кросс", date=date(2024, 5, 1),
+                      responsible_id=teacher.teacher_id, distance=1000)
+        db.session.add_all([school_class, event])
+        db.session.flush()
+        participant = Participant(school_id=school.school_id, class_id=school_class.class_id, first_name="Анна",
+                                  last_name="Иванова", birth_date=date(2012, 3, 1), gender="F")
+        db.session.add(participant)
+        db.session.flush()
+        db.session.add_all([
+            EventParticipant(event_id=event.event_id, participant_id=participant.participant_id,
+                             registration_date=date(2024, 4, 1)),
+            Result(event_id=event.event_id, participant_id=participant.participant_id,
+                   category_id=category.category_id, time=timedelta(minutes=5), points=25, place=1),
+        ])
+        db.session.commit()
+
+
+def _full_scans(app):
+    with app.app_context():
+        return [f"{description} ({table}):\n{plan}"
+                for description, table, plan, ok in check_index_usage() if not ok]
+
+
+def test_main_queries_use_indexes(app, results):
+    assert _full_scans(app) == []
+
+
+def test_missing_index_is_reported(app, results):
+    with app.app_context():
+        db.session.execute(text("DROP INDEX public.ix_results_participant_id"))
+        db.session.commit()
+    assert any(scan.startswith("add_results: результаты участника") for scan in _full_scans(app))
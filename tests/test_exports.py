@@ -0,0 +1,10 @@
+import csv
+import io
+
+
+def test_school_points_csv_ordered_by_points(client, standings):
+    response = client.get("/school_points/export.csv")
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True).lstrip("\ufeff"))))
+    assert rows[0][0] == "Школа"
+    assert [row[0] for row in rows[1:]] == standings
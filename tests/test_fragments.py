@@ -0,0 +1,27 @@
+import socket
+
+from app import fragments
+from app.fragments import DisabledBackend, MemcachedBackend, MemoryBackend
+
+
+def test_single_process_uses_memory(make_app):
+    app = make_app(WEB_CONCURRENCY=1, FRAGMENT_CACHE_URL="")
+    assert isinstance(app.extensions["fragment_cache"], MemoryBackend)
+
+
+def test_several_processes_use_default_memcached(make_app, tmp_path, monkeypatch):
+    path = str(tmp_path / "memcached.sock")
+    monkeypatch.setattr(fragments, "DEFAULT_MEMCACHED_URL", f"unix:{path}")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(path)
+        app = make_app(WEB_CONCURRENCY=4, FRAGMENT_CACHE_URL="")
+    backend = app.extensions["fragment_cache"]
+    assert isinstance(backend, MemcachedBackend)
+    assert backend.path == path
+
+
+def test_several_processes_without_memcached_disable_cache(make_app, tmp_path, monkeypatch):
+    monkeypatch.setattr(fragments, "DEFAULT_MEMCACHED_URL", f"unix:{tmp_path / 'missing.sock'}")
+    app = make_app(WEB_CONCURRENCY=4, FRAGMENT_CACHE_URL="")
+    assert isinstance(app.extensions["fragment_cache"], DisabledBackend)
+    assert app.test_client().get("/school_points").status_code == 200
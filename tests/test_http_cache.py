@@ -0,0 +1,42 @@
+from app import db
+from app.models import School
+
+
+def test_not_modified_until_table_changes(app, client):
+    first = client.get("/schools")
+    assert first.status_code == 200
+    assert client.get("/schools", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    with app.app_context():
+        db.session.add(School(name="School №3"))
+        db.session.commit()
+    changed = client.get("/schools", headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert "School №3" in changed.get_data(as_text=True)
+
+
+def test_change_in_other_process_invalidates_cached_page(client, other_process):
+    first = client.get("/schools")
+    assert first.status_code == 200
+
+    # Другой процесс сервера (или CLI-команда) добавляет школу
+    other_process(
+        "from app.models import School\n"
+        "db.session.add(School(name='School №3'))\n"
+        "db.session.commit()"
+    )
+    changed = client.get("/schools", headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != first.headers["ETag"]
+    assert "School №3" in changed.get_data(as_text=True)
+
+
+def test_cache_state_belongs_to_each_app(app, client, make_app, tmp_path):
+    # Второе приложение на базе без table_versions (схема не обновлена)
+    other = make_app(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'old.db'}", AUTO_MIGRATE=False)
+    assert other.extensions["http_cache"].enabled is False
+    assert app.extensions["http_cache"].enabled is True
+
+    first = client.get("/schools")
+    assert "ETag" in first.headers
+    assert client.get("/schools", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
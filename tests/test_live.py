@@ -0,0 +1,43 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app import db
+from app.models import Event, School, Sport, Teacher, format_time
+
+
+@pytest.fixture
+def make_event(app):
+    def make(event_date):
+        with app.app_context():
+            school = db.session.query(School).first()
+            sport = Sport(name=f"Бег {event_date}")
+            teacher = Teacher(first_name="Иван", last_name="Петров", school_id=school.school_id)
+            db.session.add_all([sport, teacher])
+            db.session.flush()
+            event = Event(sport_id=sport.sport_id, name="Кросс", date=event_date,
+                          responsible_id=teacher.teacher_id, distance=1000)
+            db.session.add(event)
+            db.session.commit()
+            return event.event_id
+    return make
+
+
+def test_stream_ends_after_limit(make_app, make_event):
+    app = make_app(LIVE_STREAM_SECONDS=1)
+    event_id = make_event(date.today())
+    body = app.test_client().get(f"/event/{event_id}/live").get_data(as_text=True)
+    assert body.startswith("retry: 3000\n\n")
+    assert "event: snapshot" in body
+
+
+def test_live_script_only_on_event_day(client, make_event):
+    today = make_event(date.today())
+    past = make_event(date.today() - timedelta(days=7))
+    assert "EventSource" in client.get(f"/event/{today}").get_data(as_text=True)
+    assert "EventSource" not in client.get(f"/event/{past}").get_data(as_text=True)
+
+
+def test_format_time():
+    assert format_time(timedelta(hours=1, minutes=2, seconds=3)) == "01:02:03"
+    assert format_time(None) == ""
@@ -0,0 +1,21 @@
+from sqlalchemy import inspect, select
+
+from app import db
+from app.migrations import LATEST_VERSION, current_version
+from app.models import School
+
+
+def test_startup_migrates_empty_database(other_process, make_app, capsys):
+    assert f"Applying migration {LATEST_VERSION}" in other_process()
+
+    app = make_app()
+    assert "Applying migration" not in capsys.readouterr().out
+    with app.app_context():
+        assert current_version() == LATEST_VERSION
+        tables = set(inspect(db.engine).get_table_names(schema="public"))
+        assert {"schools", "events", "participants", "results", "school_points"} <= tables
+        assert db.session.scalars(select(School.name).order_by(School.name)).all() == ["School №1", "School №2"]
+
+
+def test_index_page_on_migrated_database(client):
+    assert client.get("/").status_code == 200
@@ -0,0 +1,45 @@
+import pytest
+from flask import Response, stream_with_context
+from sqlalchemy import text
+
+from app import db
+from app.query_guard import QueryLimitExceeded
+
+
+def _add_routes(app):
+    def statements(count):
+        for _ in range(count):
+            db.session.execute(text("SELECT 1"))
+            yield "."
+
+    @app.route("/test/plain/<int:count>")
+    def plain(count):
+        return "".join(statements(count))
+
+    @app.route("/test/stream/<int:count>")
+    def stream(count):
+        return Response(stream_with_context(statements(count)))
+
+
+@pytest.fixture
+def guarded(make_app):
+    app = make_app(SQL_STATEMENT_LIMIT=2)
+    _add_routes(app)
+    return app.test_client()
+
+
+def test_statements_within_limit(guarded):
+    assert guarded.get("/test/plain/2").status_code == 200
+    assert guarded.get("/test/stream/2").get_data(as_text=True) == ".."
+
+
+def test_limit_exceeded(guarded):
+    with pytest.raises(QueryLimitExceeded):
+        guarded.get("/test/plain/3")
+
+
+def test_streamed_body_statements_are_counted(guarded):
+    response = guarded.get("/test/stream/3")
+    assert response.get_data(as_text=True) == "..."
+    with pytest.raises(QueryLimitExceeded, match="GET /test/stream/3: 3 SQL statements"):
+        response.close()
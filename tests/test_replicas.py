@@ -0,0 +1,79 @@
+import shutil
+import sqlite3
+import time
+
+import pytest
+
+from app import db
+from app.models import School
+from app.query_guard import QueryLimitExceeded
+
+
+@pytest.fixture
+def replica(make_app, database_url, tmp_path):
+    """Путь к реплике: копии основной базы SQLite, которая дальше не обновляется."""
+    if not database_url.startswith("sqlite:///"):
+        pytest.skip("реплика-копия поддерживается только для SQLite")
+    make_app()
+    primary = database_url[len("sqlite:///"):]
+    path = str(tmp_path / "replica.db")
+    for suffix in ("", ".public"):
+        shutil.copyfile(primary + suffix, path + suffix)
+    return path
+
+
+def _replica_app(make_app, url, **config):
+    return make_app(DATABASE_REPLICA_URLS=[url], REPLICA_STICKY_SECONDS=60, **config)
+
+
+def _add_to_replica(path, name):
+    with sqlite3.connect(f"{path}.public") as connection:
+        connection.execute("INSERT INTO schools (name) VALUES (?)", (name,))
+
+
+def test_get_reads_from_replica_until_client_writes(make_app, replica):
+    _add_to_replica(replica, "Только на реплике")
+    client = _replica_app(make_app, f"sqlite:///{replica}").test_client()
+
+    assert "Только на реплике" in client.get("/schools").get_data(as_text=True)
+
+    response = client.post("/add_school", data={"name": "Новая", "address": "ул. Школьная, 1",
+                                                "contact_phone": "12345"})
+    assert response.status_code == 302
+    # После записи клиент читает из основной базы
+    page = client.get("/schools").get_data(as_text=True)
+    assert "Новая" in page
+    assert "Только на реплике" not in page
+
+
+def test_lagging_replica_is_not_cached_under_new_etag(make_app, replica):
+    app = _replica_app(make_app, f"sqlite:///{replica}")
+    client = app.test_client()
+    before = client.get("/schools").headers["ETag"]
+
+    # Запись другого клиента: реплика ее еще не получила
+    with app.app_context():
+        db.session.add(School(name="Школа после записи"))
+        db.session.commit()
+
+    changed = client.get("/schools", headers={"If-None-Match": before})
+    assert changed.status_code == 200
+    assert "Школа после записи" in changed.get_data(as_text=True)
+    assert client.get("/schools", headers={"If-None-Match": changed.headers["ETag"]}).status_code == 304
+    assert "Школа после записи" in client.get("/schools").get_data(as_text=True)
+
+
+def test_unavailable_replica_falls_back_to_primary(make_app, tmp_path, capsys):
+    app = _replica_app(make_app, f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+
+    response = app.test_client().get("/schools")
+    assert response.status_code == 200
+    assert "School №1" in response.get_data(as_text=True)
+    assert app.extensions["replicas"].replicas[0].down_until > time.monotonic()
+    assert "is unavailable, reading from the primary" in capsys.readouterr().out
+
+
+def test_replica_statements_are_counted(make_app, replica):
+    app = _replica_app(make_app, f"sqlite:///{replica}", SQL_STATEMENT_LIMIT=1)
+    with pytest.raises(QueryLimitExceeded):
+        app.test_client().get("/schools")